@@ -1,94 +1,36 @@
-import random
-import json
-import csv
-import math
+import numpy as np
 
+from Common.job_store import generate_jobs as select_jobs
+from Common.intervals import get_job_intervals
+from Common.profile import pdac_objectives, aac_objectives
+from Common.stats import timed
+from Common.windows import sliding_window_sum
+
+
+# The relative difference below which two interval scores are treated as equal
+TIE_TOLERANCE = 1e-12
 
 
 """
-* generate_jobs -> This function takes in a random sample of jobs and returns a list of job objects. This function also selects 
-*   these jobs based on the given input parameters
+* generate_jobs -> This function selects a batch of jobs based on the given input parameters and returns them sorted by flexibility
 * 
 * INPUTS
-*   jobs_array (List) -> an unsorted list of all of the jobs available to the user
+*   jobs_array (JobStore or list) -> All of the jobs available to the user
 *   start_time (int) -> The time after which all jobs must start
 *   end_time (int) -> The time by which all jobs must end
 *   max_length (int) -> The maximum duration of a given job
 *   batch_size (int) -> The size of the batch
 * 
 * ADDITIONAL
-* This function will select the jobs based on the parameters. However, it should not select different jobs than other algorithms becuase they will all
-* be provided with the same jobs_array list and parameters
+* The flexibility of a job is a measure of how flexibly it can be scheduled. If a job has more viable intervals
+* that it can be scheduled within, it is considered more flexible. 
+* The jobs are sorted in ascending order of flexibility
 """
 def generate_jobs(jobs_array, start_time, end_time, max_length, batch_size):
-    jobs = []
-
-    # Iterate through the job objects and create an array of objects that fall within the specified time window
-    i = 0
-    curr_index = 0
-    while (i < batch_size):
-        aj = jobs_array[curr_index]['release']
-        dj = jobs_array[curr_index]['deadline']
-        lj = jobs_array[curr_index]['length']
-
-        fj = aj - dj - lj
-
-        # Check if the specific job lies within the correct window
-        # The funky syntax is used to put the job id at the very front of the dictionary
-        if aj >= start_time and dj <= end_time and lj <= max_length:
-            job_id = {"job_id" : i}
-
-            flexibility = {'flexibility': fj}
-            flexible_object = {**job_id, **flexibility, **jobs_array[curr_index]}
-            jobs.append(flexible_object)
-            
-            i += 1
-        
-        curr_index += 1
+    jobs = select_jobs(jobs_array, start_time, end_time, max_length, batch_size)
 
     # Sort the jobs in ascending order based on their flexibility
-    jobs = sorted(jobs, key=lambda job: job['flexibility']) 
-
-    return jobs
-
-
-
-"""
-* get_job_intervals -> This function is responsible for going through each of the jobs in the algorithm and returning all the intervals 
-*   that the job could possibly run within
-* 
-* INPUTS
-*   jobs (list) -> This is the list of jobs in this case
-"""
-def get_job_intervals(jobs, start_time):
-    intervals = [[] for _ in range(len(jobs))]
-    for i, job in enumerate(jobs):
-        # Extract the necessary information from the job object
-        release = job['release'] - start_time
-        deadline = job['deadline'] - start_time
-        duration = job['length']
-        num = release
-
-        # Add the execution intervals to the sublist
-        while (num + duration <= deadline):
-            intervals[i].append((num, num + duration))
-            num += 1
-    
-    return intervals
-
-
-
-"""
-* get_job_heights -> This function returns a list of the height of each respective job. The index of the job height corresponds to the 
-*   jobs id
-* 
-* INPUTS
-*   jobs (list) -> The list of jobs for the trial
-"""
-def get_job_heights(jobs):
-    height = [job['height'] for job in jobs]
-
-    return height
+    return jobs.sort_by_flexibility()
 
 
 """
@@ -96,63 +38,77 @@ def get_job_heights(jobs):
 *   on the amount of job area above the curve
 * 
 * INPUTS
-*   intervals (list) -> the intervals during which each job can run
-*   jobs (list) -> the list of jobs in the trial
+*   jobs (JobStore) -> the jobs in the trial
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
 *   num_time_steps -> the number of distinct time steps during the period
 * 
 * ADDITIONAL
-* This function returns a list of height values across the entire time period. These are the heights generated by the greedy schedule
+* This function returns a list of height values across the entire time period. These are the heights generated by the greedy schedule.
+* The score of an interval is the sum of the scheduled heights plus the job's height minus the resources over the interval, and each job
+* takes the interval with the smallest score, choosing the earliest one on a tie. The job's height adds the same amount to the score of
+* every interval, so the intervals are compared by the window sums of the heights minus the resources alone. Those come from prefix sums,
+* so every interval costs the same no matter how long the job is
 """
 def generate_greedy_schedule(jobs, resources, intervals, num_time_steps):
-    final_heights = [0 for _ in range(num_time_steps)]
-    for job_id, interval_set in enumerate(intervals):
-        best_score = float(math.inf)
-        best_interval = None
-
-        job_height = jobs[job_id]['height']
-
-        for interval in interval_set:
-            interval_start, interval_end = interval[0], interval[1]
-
-            # We want to find the max of this array above
-            # because we are more concerned right now with PDAC
-            score = sum([(final_heights[i] + job_height) - resources[i] for i in range(interval_start, interval_end)])
-
-            if score < best_score:
-                best_score = score
-                best_interval = interval
-
-        
-        for i in range(best_interval[0], best_interval[1]):
-            final_heights[i] += job_height    
+    final_heights = np.zeros(num_time_steps, dtype=np.float64)
+    resources = np.asarray(resources[:num_time_steps], dtype=np.float64)
+
+    heights = jobs.height.tolist()
+    first_starts = intervals.first_start.tolist()
+    last_starts = intervals.last_start.tolist()
+    lengths = intervals.length.tolist()
+
+    for job_id in range(len(intervals)):
+        first_start, last_start, length = first_starts[job_id], last_starts[job_id], lengths[job_id]
+        job_height = heights[job_id]
+
+        # The scheduled heights minus the resources over every time step that any of the job's intervals cover
+        excess = final_heights[first_start:last_start + length] - resources[first_start:last_start + length]
+
+        # The interval that adds the least area above the curve is the one with the smallest window sum
+        # Prefix sums can leave a rounding error between windows that have exactly the same sum, so scores within a tiny relative
+        # tolerance of the smallest one count as a tie and the earliest of them is chosen
+        scores = sliding_window_sum(excess, length)
+        tolerance = TIE_TOLERANCE * max(1.0, float(np.abs(scores).max()))
+        best_start = first_start + int(np.argmax(scores <= scores.min() + tolerance))
+
+        # Add the job's height over its best interval
+        final_heights[best_start:best_start + length] += job_height
     
-    return final_heights
+    return final_heights.tolist()
 
 
 """
-* solve_aac_greedy -> This function calculates and returns the objective value for the greedy schedule
+* solve_aac_greedy -> This function schedules the jobs greedily by the area above the curve and returns the peak demand above the curve
+*   (PDAC) and the area above the curve (AAC) of the schedule
 * 
-* INPUTS
-*   final_heigts (list) -> The list of heights generated by the greedy schedule
+* INPUTS 
+*   jobs_array (JobStore or list) -> An unfiltered store or list of all of the possible jobs available for scheduling
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   start_time (int) -> The earliest possible starting time for each job
+*   end_time (int) -> The latest possible ending time for each job
+*   max_length (int) -> The maximum length of a given job
+*   batch_size (int) -> The number of jobs that should be included in the schedule
+*   stats (SolveStats) -> An optional statistics object that records how long picking the jobs and building the schedule took
 """
-def solve_aac_greedy(jobs_array, resources, start_time, end_time, max_length, batch_size):
+def solve_aac_greedy(jobs_array, resources, start_time, end_time, max_length, batch_size, stats=None):
     # Specify the number of time steps 
     num_time_steps = end_time - start_time
 
     # Generate the jobs
-    jobs = generate_jobs(jobs_array, start_time, end_time, max_length, batch_size)
+    with timed(stats, 'jobs'):
+        jobs = generate_jobs(jobs_array, start_time, end_time, max_length, batch_size)
 
     # Generate the intervals
-    intervals = get_job_intervals(jobs, start_time)
-
-    final_heights = generate_greedy_schedule(jobs, resources, intervals, num_time_steps)
-
-    objective_value = 0
-    for i, height in enumerate(final_heights):
-        if height - resources[i] > objective_value:
-            objective_value = height - resources[i]
+    with timed(stats, 'intervals'):
+        intervals = get_job_intervals(jobs, start_time)
 
+    with timed(stats, 'schedule'):
+        final_heights = generate_greedy_schedule(jobs, resources, intervals, num_time_steps)
 
-    # print("Greedy Objctive Value:", objective_value)
-    return objective_value
+    # Calculate the peak demand above the curve and the area above the curve of the schedule
+    objective_value = float(pdac_objectives(final_heights, resources))
+    area_value = float(aac_objectives(final_heights, resources))
 
+    return (objective_value, area_value)
\ No newline at end of file
@@ -1,131 +1,37 @@
-import cplex
-import random
-import json
-import math
-
-"""
-* generate_jobs -> This function takes in a random sample of jobs and returns a list of job objects. This function also selects 
-*   these jobs based on the given input parameters
-* 
-* INPUTS
-*   jobs_array (List) -> an unsorted list of all of the jobs available to the user
-*   start_time (int) -> The time after which all jobs must start
-*   end_time (int) -> The time by which all jobs must end
-*   max_length (int) -> The maximum duration of a given job
-* 
-* ADDITIONAL
-* This function will select the jobs based on the parameters. However, it should not select different jobs than other algorithms becuase they will all
-* be provided with the same jobs_array list and parameters
-"""
-def generate_jobs(jobs_array, start_time, end_time, max_length, batch_size):
-    jobs = []
-
-    # Iterate through the job objects and create an array of objects that fall within the specified time window
-    i = 0
-    curr_index = 0
-    while (i < batch_size):
-        aj = jobs_array[curr_index]['release']
-        dj = jobs_array[curr_index]['deadline']
-        lj = jobs_array[curr_index]['length']
-
-        # Check if the specific job lies within the correct window
-        # The funky syntax is used to put the job id at the very front of the dictionary
-        if aj >= start_time and dj <= end_time and lj <= max_length:
-            job_id = {"job_id" : i}
-            job_object = {**job_id, **jobs_array[curr_index]}
-            jobs.append(job_object)
-            
-            i += 1
-        
-        curr_index += 1
-
-    return jobs
-
-
-"""
-* get_job_intervals -> This function is responsible for going through each of the jobs in the algorithm and returning all the intervals 
-*   that the job could possibly run within
-* 
-* INPUTS
-*   jobs (list) -> This is the list of jobs in this case
-"""
-def get_job_intervals(jobs, start_time):
-    intervals = [[] for _ in range(len(jobs))]
-    for i, job in enumerate(jobs):
-        # Extract the necessary information from the job object
-        release = job['release'] - start_time
-        deadline = job['deadline'] - start_time
-        duration = job['length']
-        num = release
-
-        # Add the execution intervals to the sublist
-        while (num + duration <= deadline):
-            intervals[i].append((num, num + duration))
-            num += 1
-
-    return intervals
-
-
-
-"""
-* get_job_heights -> This function returns a list of the height of each respective job. The index of the job height corresponds to the 
-*   jobs id
-* 
-* INPUTS
-*   jobs (list) -> The list of jobs for the trial
-"""
-def get_job_heights(jobs):
-    height = [job['height'] for job in jobs]
-
-    return height
-
-
+import numpy as np
 
+from Common.job_store import generate_jobs
+from Common.intervals import get_job_intervals
+from Common.variables import generate_decision_variables
+from Common.model_builder import get_job_heights, assignment_rows, time_step_rows, append_column
+from Common.backends import LinearModel, solve_model
+from Common.rounding import round_relaxed_solution
+from Common.profile import height_profiles, pdac_objectives
+from Common.stats import timed, counted, record_model, record_solution
+from Common.planner import estimate_model, check_model_size
+from Common.solution_cache import get_cache, lookup_solution
 
 """
-* generate_decision_variables -> This function generates a list of all of the decision variables for the ILP
+* generate_ilp -> This creates the ILP model and its variables
 * 
 * INPUTS
-*   intervals (list) -> This is the list of the intervals that each job can run within
-* 
-* ADDITIONAL
-    - This code creates a list of decision variables with the form {'name': x_i_j, value: ?} where each name is a distinct time interval for a distinct job.
-    - Specifically, this is saying that decision variable x_i_j is the ith possible interval for job j where the value is the actual interval of time steps.
-    - This is stored here so we don't have to repeatedly query the intervals list
-"""
-def generate_decision_variables(intervals):
-    decision_variables = []
-    for j, interval_set in enumerate(intervals):
-        for i, interval in enumerate(interval_set):
-            # Add the decision variable and it's corresponding interval to the list
-            decision_variables.append({'name' : f'x_{i}_{j}', 'value': interval})
-    
-    return decision_variables
-
-
-
-"""
-* generate_ilp -> This creates an ILP CPLEX instance
-* 
-* INPUTS
-*   decision_variables (list) -> This is the list of all of the decision variables in the ILP
+*   decision_variables (DecisionVariables) -> The layout of all of the decision variables in the ILP
 *   height (list) -> This list of job heights for each job in the trial
 *   num_time_steps (int) -> The number of discrete time steps in the period
+*   debug_names (bool) -> Whether to give every variable a readable name (x_i_j and n_i) for debugging
 """
-def generate_ilp(decision_variables, height, num_time_steps): 
-    # Create the cplex problem
-    problem = cplex.Cplex()
-    problem.set_problem_type(cplex.Cplex.problem_type.LP)
-    problem.set_results_stream(None)
-
-    # Maximize objective
-    problem.objective.set_sense(problem.objective.sense.minimize)
+def generate_ilp(decision_variables, height, num_time_steps, debug_names=False): 
+    # Create the model. It does not depend on any solver, and is handed to the chosen backend once it is complete
+    # The objective is always minimized
+    problem = LinearModel()
 
-    # This is the name of the objective variable that we will minimize
-    objective_variables = [f'n_{i}' for i in range(num_time_steps)]
+    # The variables are referred to by their index. Decision variable k is index k and the objective variables n_0, n_1, ... come right
+    # after them, so the variables are only named when debugging
+    objective_variables = range(num_time_steps)
 
-    # This retrieves the names of all of the decision variables 
-    names = [variable['name'] for variable in decision_variables] + objective_variables
+    names = None
+    if debug_names:
+        names = decision_variables.names() + [f'n_{i}' for i in objective_variables]
 
     max_height = sum(height)
 
@@ -135,8 +41,8 @@ def generate_ilp(decision_variables, height, num_time_steps):
     ub = [1 for _ in range(len(decision_variables)) ] + [max_height for _ in range(len(objective_variables))]
 
     # Establish the problem
-    types = [problem.variables.type.continuous] * (len(decision_variables)) + [problem.variables.type.continuous] * (len(objective_variables))
-    problem.variables.add(obj=obj, lb=lb, ub=ub, types=types, names=names)
+    integer = [False] * (len(decision_variables)) + [False] * (len(objective_variables))
+    problem.add_variables(obj=obj, lb=lb, ub=ub, integer=integer, names=names)
 
     return problem
 
@@ -145,10 +51,10 @@ def generate_ilp(decision_variables, height, num_time_steps):
 * generate_contraints -> This function generates and applies the necessary linear constraints to the ILP instance
 * 
 * INPUTS
-*   decision_variables (list) -> This is the list of all of the decision variables in the ILP
+*   decision_variables (DecisionVariables) -> The layout of all of the decision variables in the ILP
 *   height (list) -> This list of job heights for each job in the trial
-*   intervals (list) -> The list of intervals that each respective job can run in
-*   problem (CPLEX problem) -> The CPLEX problem instance
+*   intervals (JobIntervals) -> The range of intervals that each respective job can run in
+*   problem (LinearModel) -> The model of the problem
 * 
 * ADDITIONAL
 * This function does not have a return value. It's job is to apply the constraints to the problem
@@ -158,153 +64,131 @@ def generate_constraints(resources, decision_variables, height, intervals, probl
     """
     This will generate the first set of constraints
 
-    This for loop adds the constraints that make it so that a job can run during only one interval. So for each job, aggregate all of the decision variables that correspond to each possible execution interval for that job. 
-    Then specify that they all of those decision variables can only add up to one
+    These constraints make it so that a job can run during only one interval. For each job, all of the decision variables that correspond to each 
+    possible execution interval for that job can only add up to one. All of these rows are added to the problem at once
     """
-    curr_index = 0
-    for interval in intervals:
-        # Aggregate all the decision variables that belong to one job
-        variables = decision_variables[curr_index : curr_index + (len(interval))]
-        variables = [v['name'] for v in variables]
-        curr_index += len(interval)
-        
-        # The coefficient of each decision variable is one
-        constraints = [1 for _ in range(len(variables))]
-
-        # This is saying that the sum of each of the decision variabels can only equal one
-        problem.linear_constraints.add(
-            lin_expr=[ [ variables, constraints ] ],
-            senses=['E'],
-            rhs=[1]
-        )
+    problem.add_rows(assignment_rows(intervals), 'E', np.ones(len(intervals)))
 
 
     """
     This generates the second set of constraints
 
-    It aggregates all of the desicion variables that correspond to intervals that could possibly be running during that time step.
-    It then aggregates the heights corresponding to the jobs that each decision variable represents. It multiplies 
-    those heights by the decision variables. However, the constrain ensures that the total sum is less than the max height d
+    For each time step, it aggregates all of the decision variables that correspond to intervals that could possibly be running during that time step
+    and multiplies them by the heights of their jobs. The constraint ensures that this sum minus the height n_i above the curve is at most the 
+    resources available at that time step. The rows come from the same sweep over the job intervals that the PDAC models use, instead of checking 
+    every decision variable at every time step
     """
-    for i in range(num_time_steps):
-        use_variables = []
-        use_height = []
-
-        for variable in decision_variables:
-            
-            # Check the interval times of the corresponding variable
-            # Then check if the current timestep falls within that interval
-            job_interval_start, job_interval_end = variable['value'][0], variable['value'][1]
-
-            if job_interval_start <= i < job_interval_end:
-                job_id = int(variable['name'].split('_')[-1])
-
-                use_height.append(height[job_id])
-                use_variables.append(variable['name'])
+    # The objective variables n_0, n_1, ... come right after all of the decision variables, one for each time step
+    objective_indices = len(decision_variables) + np.arange(num_time_steps)
 
-        # Add the objective variable corresponding to this time step to the decision variables 
-        use_variables.append(f'n_{i}')
-        use_height.append(-1)
-
-        # Add the linear constraint to the problem
-        problem.linear_constraints.add(
-            lin_expr=[ [ use_variables, use_height ] ],
-            senses=['L'],
-            rhs=[resources[i]]
-        )
+    rows = append_column(time_step_rows(intervals, height, num_time_steps), objective_indices, -1)
+    problem.add_rows(rows, 'L', resources[:num_time_steps])
 
 
 """
 * choose_relaxed_schedule -> This function chooses a schedule probabailistically based on the results of the LP solution
 * 
 * INPUTS
-*   decision_variables (list) -> This is the list of all of the decision variables in the ILP
+*   decision_variables (DecisionVariables) -> The layout of all of the decision variables in the ILP
 *   height (list) -> This list of job heights for each job in the trial
-*   intervals (list) -> The list of intervals that each respective job can run in
-*   problem (CPLEX problem) -> The CPLEX problem instance
+*   intervals (JobIntervals) -> The range of intervals that each respective job can run in
+*   solution (Solution) -> The solution of the LP
+*   rng (numpy Generator) -> The random number generator used to round the LP solution. Pass a seeded one to make the schedule repeatable
 """
-def choose_relaxed_schedule(decision_variables, intervals, num_time_steps, height, problem):
-    problem.solve()
-    solution = problem.solution
-
-
-    # Loop through each of the jobs and generate a random number
-    # Choose a decision variable based on the probability of the current value of the decision variables
-    # Add that chosen variable to a final list so that the overall objective value can be ascertained
-    final_intervals = []
-    final_heights = [0 for _ in range(num_time_steps)]
+def choose_relaxed_schedule(decision_variables, intervals, num_time_steps, height, solution, rng=None):
 
-    curr_index = 0
-    # Loop through each job
-    for job_id in range(len(intervals)):
-        # Generate a random number for the job to be used to select a specific interval
-        random_num = random.uniform(0, 1)
-        probability = 0
 
-        # Loop through each interval in the job and get the value corresponding to each interval (decision variable)
-        # Add the decision variable to the final interval list based on the random number 
-        for i, interval in enumerate(intervals[job_id]):
-            decision_variable = decision_variables[curr_index]
-            decision_value = solution.get_values(decision_variable['name'])
-            probability += decision_value
+    # The values of every decision variable, as returned by the solver
+    solution_values = solution.primal
 
-            if random_num <= probability and len(final_intervals) <= job_id:
-                final_intervals.append(decision_variable)
-            
-            curr_index += 1
+    # Randomly choose one interval (decision variable) for every job, using the decision variable values as the probabilities
+    # Add those chosen variables to a final list so that the overall objective value can be ascertained
+    final_intervals = round_relaxed_solution(solution_values, decision_variables, rng)
 
-    # Generate the height of all of the jobs over the course of all of the time steps
-    # Do this by iterating through all of the selected job intervals in final_intervals and add their height values 
-    # to the final_heights arrays. From this we can determine the objective value of d
-    # simply take the maximum from this height list
-    for job_id, job in enumerate(final_intervals):
-        job_start = job['value'][0]
-        job_end = job['value'][1]
-        job_height = height[job_id]
+    # Generate the height of all of the jobs over the course of all of the time steps from the selected job intervals in
+    # final_intervals. From this we can determine the objective value of d by simply taking the maximum from this height list
+    final_heights = height_profiles(decision_variables.start[final_intervals], decision_variables.end[final_intervals], height, num_time_steps)
 
-        for i in range(job_start, job_end):
-            final_heights[i] += job_height
-
-    return final_heights
+    return final_heights.tolist()
 
 
 
 """
-* solve_lp -> This function solves the provided LP instance
+* solve_aac_lp -> This function creates and solves a relaxed LP problem that minimizes the area of job power above the resource curve (AAC) and
+*   returns the peak demand above the curve of the randomly rounded schedule
 * 
 * INPUTS 
-*   problem -> The CPLEX ILP instance
-"""
-def solve_aac_lp(jobs_array, resources, start_time, end_time, max_length, batch_size):
+*   jobs_array (JobStore or list) -> An unfiltered store or list of all of the possible jobs available for scheduling
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   start_time (int) -> The earliest possible starting time for each job
+*   end_time (int) -> The latest possible ending time for each job
+*   max_length (int) -> The maximum length of a given job
+*   batch_size (int) -> The number of jobs that should be included in the schedule
+*   stats (SolveStats) -> An optional statistics object that records how long each phase took, the size of the model and what the
+*       solver reported
+*   backend (str) -> The solver backend that solves the model, either 'cplex' or 'highs'
+*   rng (numpy Generator) -> The random number generator used to round the LP solution. Pass a seeded one to make the schedule repeatable
+*   memory_limit (int) -> An optional limit on the bytes the model may use. Its size is predicted from the job windows before anything
+*       is built, and a ModelTooLargeError is raised if it would not fit. By default it is half of the physical memory
+*   cache (SolutionCache or str) -> An optional solution cache, or the path of its directory. If the same LP was solved before, its
+*       solution is read from the cache and only the rounding is done
+"""
+def solve_aac_lp(jobs_array, resources, start_time, end_time, max_length, batch_size, stats=None, backend='cplex', rng=None, memory_limit=None, cache=None):
     # Specify the number of time steps 
     num_time_steps = end_time - start_time
 
     # Generate the jobs
-    jobs = generate_jobs(jobs_array, start_time, end_time, max_length, batch_size)
+    with timed(stats, 'jobs'):
+        jobs = generate_jobs(jobs_array, start_time, end_time, max_length, batch_size)
 
     # Generate the intervals
-    intervals = get_job_intervals(jobs, start_time)
+    with timed(stats, 'intervals'):
+        intervals = get_job_intervals(jobs, start_time)
 
     # Get the job heights
     height = get_job_heights(jobs)
 
-    # Generate the decision variables
-    decision_variables = generate_decision_variables(intervals)
+    # Look for the solution of the same LP in the cache
+    cache = get_cache(cache)
+    key, solution, _ = lookup_solution(cache, stats, 'aac_lp', backend, {}, height, intervals, resources, num_time_steps)
 
-    # Instantiate the CPLEX ILP
-    problem = generate_ilp(decision_variables, height, num_time_steps)
+    if solution is None:
+        # Fail straight away if the model would not fit, instead of running out of memory while building it
+        check_model_size(estimate_model(intervals, num_time_steps, objective='aac'), memory_limit)
 
-    # Apply the linear constraints to the problem
-    generate_constraints(resources, decision_variables, height, intervals, problem, num_time_steps)
+        # Build the model. Laying out the variables and building the constraints are timed separately from solving it
+        with timed(stats, 'variables'):
+            # Generate the decision variables
+            decision_variables = generate_decision_variables(intervals)
 
-    # Choose the schedule
-    final_heights = choose_relaxed_schedule(decision_variables, intervals, num_time_steps, height, problem)
+            # Instantiate the ILP model
+            problem = generate_ilp(decision_variables, height, num_time_steps)
 
-    objective_value = 0
-    for i, height in enumerate(final_heights):
-        if height - resources[i] > objective_value:
-            objective_value = height - resources[i]
+        with timed(stats, 'constraints'):
+            # Apply the linear constraints to the problem
+            generate_constraints(resources, decision_variables, height, intervals, problem, num_time_steps)
+
+        record_model(stats, problem)
+
+        # Solve the relaxed LP
+        with timed(stats, 'solve'):
+            solution = solve_model(problem, backend)
+        record_solution(stats, solution)
+
+        if key is not None:
+            cache.store(key, solution)
+
+    else:
+        # Only the layout of the decision variables is needed to read the cached solution
+        with timed(stats, 'variables'):
+            decision_variables = generate_decision_variables(intervals)
+
+    # Choose the schedule
+    with timed(stats, 'round'):
+        final_heights = choose_relaxed_schedule(decision_variables, intervals, num_time_steps, height, solution, rng)
+    counted(stats, 'samples')
 
+    # Calculate the peak demand above the curve of the schedule
+    objective_value = float(pdac_objectives(final_heights, resources))
 
-    # print("Greedy Objctive Value:", objective_value)
     return objective_value
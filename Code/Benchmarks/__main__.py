@@ -0,0 +1,108 @@
+"""
+----- Run the Benchmark Suite -----
+
+This program runs the benchmark suite from the command line. Run it from the Code folder:
+
+    python -m Benchmarks --quick
+
+It prints every measurement as it is taken, writes all of them to a JSON file and lists every measurement that got slower, used more
+Python heap memory or changed its objective value since the baseline (Benchmarks/baseline.json unless another one is given). A baseline
+is only compared against runs on the same job and resource data. The first run saves its results as the baseline. The exit status is 1
+if there were any regressions or if nothing could be compared against the baseline, so it can be used in a script.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from Common.job_data import load_jobs
+from Benchmarks.suite import QUICK_INSTANCES, FULL_INSTANCES, SOLVERS, load_resource_curve, run_suite, compare_results, data_fingerprint
+
+
+INPUT_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Input_Data')
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(prog='python -m Benchmarks', description='Benchmark the PDAC and AAC solvers')
+    parser.add_argument('--quick', action='store_true', help='only run the small instances')
+    parser.add_argument('--solvers', nargs='+', default=list(SOLVERS), choices=list(SOLVERS), help='the solvers to run')
+    parser.add_argument('--backends', nargs='+', default=['cplex'], help='the backends to run the LP and ILP solvers with')
+    parser.add_argument('--warmup', type=int, default=1, help='unrecorded runs before each measurement')
+    parser.add_argument('--repeats', type=int, default=3, help='measured runs of each measurement')
+    parser.add_argument('--jobs', default=os.path.join(INPUT_DATA, 'job_data.json'), help='the path to job_data.json')
+    parser.add_argument('--resources', default=os.path.join(INPUT_DATA, 'resource_data.json'), help='the path to resource_data.json')
+    parser.add_argument('--output', default='benchmark_results.json', help='where to write the results')
+    parser.add_argument('--baseline', default=BASELINE, help='the results file to compare against')
+    parser.add_argument('--no-baseline', action='store_true', help='do not compare against or save a baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='also write the results to the baseline file')
+    parser.add_argument('--time-tolerance', type=float, default=0.1, help='the fraction a wall time can grow by before it is flagged')
+
+    return parser.parse_args(argv)
+
+
+
+def report(key, result):
+    line = (f"{key:<40} objective {result['objective']:>14.4f}   wall {result['wall']:>9.4f}s   cpu {result['cpu']:>9.4f}s   "
+            f"py heap {result['python_peak_memory'] / 2**20:>9.2f} MiB")
+    if 'gap' in result:
+        line += f"   lower bound {result['lower_bound']:>14.4f}   gap {result['gap']:>7.2%}"
+
+    print(line)
+
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+
+    jobs = load_jobs(args.jobs)
+    resource_curve = load_resource_curve(args.resources)
+    instances = QUICK_INSTANCES if args.quick else FULL_INSTANCES
+
+    results = run_suite(jobs, resource_curve, instances, args.solvers, args.backends, args.warmup, args.repeats, report)
+    output = {'data': data_fingerprint(args.jobs, args.resources), 'results': results}
+
+    with open(args.output, 'w') as file:
+        json.dump(output, file, indent=2)
+
+    if args.no_baseline:
+        return 0
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, 'w') as file:
+            json.dump(output, file, indent=2)
+        print(f"\nSaved the baseline to {args.baseline}")
+        return 0
+
+    with open(args.baseline, 'r') as file:
+        baseline = json.load(file)
+
+    # Other data gives other batches, so there is nothing to compare
+    if baseline.get('data') != output['data']:
+        print(f"\nThe baseline {args.baseline} was measured on other job or resource data, so nothing was compared. Run with "
+              f"--save-baseline to replace it")
+        return 1
+
+    regressions, compared = compare_results(results, baseline['results'], args.time_tolerance)
+    if compared == 0:
+        print(f"\nNone of the {len(results)} results are in the baseline {args.baseline} (check the solvers, backends and instances), so "
+              f"nothing was compared")
+        return 1
+
+    if not regressions:
+        print(f"\nNo regressions in the {compared} of {len(results)} results compared against {args.baseline}")
+        return 0
+
+    print(f"\n{len(regressions)} regressions in the {compared} of {len(results)} results compared against {args.baseline}")
+    for key, measurement, old, new in regressions:
+        print(f"{key:<40} {measurement:<20} {old:>14.4f} -> {new:>14.4f}")
+
+    return 1
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
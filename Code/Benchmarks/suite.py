@@ -0,0 +1,266 @@
+"""
+----- Solver Benchmark Suite -----
+
+This program runs a fixed, seeded set of instances through every PDAC and AAC solver and measures how each solver performs on each of
+them. An instance is a batch size, a window of the resource curve (its day, start time and end time) and a maximum job length, and its
+batch of jobs is always drawn with the same seed, so every run of the suite solves exactly the same problems.
+
+Each measurement records the wall time, the CPU time, the peak Python heap memory and the objective value. The memory comes from
+tracemalloc, which only sees the memory that Python allocates, not the memory that a solver such as CPLEX or HiGHS allocates itself. The
+PDAC solvers also record the best lower bound on the PDAC of their instance (see bounds) and their optimality gap to it. The results can
+be saved as a baseline (along with fingerprints of the job and resource data they were measured on) and later runs on the same data are
+compared against it, so that a change that makes a solver slower (or changes its answers) is flagged instead of going unnoticed.
+"""
+
+import importlib
+import inspect
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+from Common.bounds import pdac_lower_bounds, optimality_gap
+from Common.job_data import source_fingerprint
+from Common.job_index import JobIndex
+from Common.resource_curve import build_resource_curve, window_offset
+
+
+"""
+----- The instances -----
+
+Each instance is (name, batch size, day, start time, end time, max length). The day picks where the window sits in the week long
+resource curve, the same way as in the analysis notebooks (see window_offset). The quick instances are small enough for every solver, including the ILPs
+"""
+QUICK_INSTANCES = [
+    ('b10_w1400', 10, 3, 0, 1400, 700),
+    ('b30_w1400', 30, 3, 0, 1400, 700),
+    ('b30_w720', 30, 1, 0, 720, 360),
+]
+
+FULL_INSTANCES = QUICK_INSTANCES + [
+    ('b500_w1400', 500, 3, 0, 1400, 700),
+    ('b800_w1400', 800, 3, 0, 1400, 700),
+    ('b1100_w1400', 1100, 3, 0, 1400, 700),
+    ('b500_w2880', 500, 2, 0, 2880, 700),
+]
+
+# The solvers, as (module, function). The ILPs are only run on instances with at most ILP_MAX_BATCH jobs
+SOLVERS = {
+    'pdac_naive': ('PDAC.pdac_scheduling_naive', 'solve_pdac_naive'),
+    'pdac_greedy': ('PDAC.pdac_scheduling_greedy', 'solve_pdac_greedy'),
+    'pdac_lp': ('PDAC.pdac_scheduling_lp', 'solve_pdac_lp'),
+    'pdac_ilp': ('PDAC.pdac_scheduling_ilp', 'solve_pdac_ilp'),
+    'aac_greedy': ('AAC.aac_scheduling_greedy', 'solve_aac_greedy'),
+    'aac_lp': ('AAC.aac_scheduling_lp', 'solve_aac_lp'),
+    'aac_ilp': ('AAC.aac_scheduling_ilp', 'solve_aac_ilp'),
+}
+
+ILP_MAX_BATCH = 50
+
+# The seed that every batch (and every LP rounding) is drawn from
+SUITE_SEED = 2024
+
+# The scale factor of the resource curve used in the analysis notebooks
+RESOURCE_SCALE = 4.233
+
+
+
+"""
+----- Build the resource curve -----
+
+* load_resource_curve -> This function returns the minute by minute resource curve of the whole week, made from the wind, solar and hydro
+*   generation that the analysis notebooks use (see resource_curve)
+*
+* INPUTS
+*   path (str) -> The path to the resource_data.json file
+*   scale (float) -> The factor that every resource value is multiplied by
+"""
+def load_resource_curve(path, scale=RESOURCE_SCALE):
+    return build_resource_curve(path, scale=scale)
+
+
+
+"""
+----- Measure a single solver -----
+
+* measure -> This function runs a solver on an instance and returns its measurements along with the result of the last run
+*
+* INPUTS
+*   solve (function) -> The solve_* function
+*   arguments (tuple) -> The positional arguments of the solve_* function
+*   options (dict) -> The keyword arguments of the solve_* function
+*   warmup (int) -> The number of runs before the measured ones, which are not recorded
+*   repeats (int) -> The number of measured runs
+*
+* ADDITIONAL
+* The times are the medians of the measured runs. Tracking memory slows Python down, so the peak Python heap memory comes from one extra
+* run of its own and never affects the times. Solvers that take a random number generator get a freshly seeded one on every run, so that every run
+* returns the same objective
+"""
+def measure(solve, arguments, options, warmup, repeats):
+    takes_rng = 'rng' in inspect.signature(solve).parameters
+
+    def run():
+        if takes_rng:
+            options['rng'] = np.random.default_rng(SUITE_SEED)
+
+        return solve(*arguments, **options)
+
+    for _ in range(warmup):
+        run()
+
+    wall_times = []
+    cpu_times = []
+    for _ in range(repeats):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = run()
+        cpu_times.append(time.process_time() - cpu_start)
+        wall_times.append(time.perf_counter() - wall_start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    objective = result[0] if isinstance(result, tuple) else result
+
+    measurements = {
+        'objective': float(objective),
+        'wall': statistics.median(wall_times),
+        'cpu': statistics.median(cpu_times),
+        'python_peak_memory': peak,
+        'repeats': repeats
+    }
+
+    return (measurements, result)
+
+
+
+"""
+----- Run the suite -----
+
+* run_suite -> This function measures every solver on every instance and returns the results, keyed by 'instance/solver' (or
+*   'instance/solver/backend' for the LP and ILP solvers)
+*
+* INPUTS
+*   jobs (JobStore or list) -> All of the jobs that batches are drawn from
+*   resource_curve (array) -> The minute by minute resource curve of the whole week
+*   instances (list) -> The instances to run
+*   solvers (list) -> The names of the solvers to run (keys of SOLVERS)
+*   backends (list) -> The solver backends to run the LP and ILP solvers with
+*   warmup (int) -> The number of unrecorded runs of each measurement
+*   repeats (int) -> The number of measured runs of each measurement
+*   report (function) -> An optional function that is called with the key and measurements of every result as soon as every solver of
+*       its instance is measured
+*
+* ADDITIONAL
+* The results of the PDAC solvers also hold 'lower_bound' and 'gap'. The bound is the best of the bounds of pdac_lower_bounds, including
+* the bound of the relaxed LP when pdac_lp is run, so it is the same for every PDAC solver of an instance
+"""
+def run_suite(jobs, resource_curve, instances, solvers, backends=('cplex',), warmup=1, repeats=3, report=None):
+    job_index = JobIndex(jobs)
+
+    results = {}
+    for name, batch_size, day, start_time, end_time, max_length in instances:
+        offset = window_offset(day, start_time)
+        resources = resource_curve[offset:offset + end_time - start_time]
+        batch = job_index.sample(start_time, end_time, max_length, batch_size, SUITE_SEED)
+        arguments = (batch, resources, start_time, end_time, max_length, batch_size)
+
+        keys = []
+        lp_solution = None
+        for solver in solvers:
+            if solver.endswith('_ilp') and batch_size > ILP_MAX_BATCH:
+                continue
+
+            module_name, function_name = SOLVERS[solver]
+            solve = getattr(importlib.import_module(module_name), function_name)
+
+            # Only the LP and ILP solvers have a backend to choose
+            if 'backend' in inspect.signature(solve).parameters:
+                runs = [(f'{name}/{solver}/{backend}', {'backend': backend}) for backend in backends]
+            else:
+                runs = [(f'{name}/{solver}', {})]
+
+            for key, options in runs:
+                results[key], result = measure(solve, arguments, options, warmup, repeats)
+                keys.append(key)
+
+                # The LP's relaxed solution has a bound that can tighten the lower bound of the instance
+                if solver == 'pdac_lp' and result.solution is not None:
+                    if lp_solution is None or result.solution.bound > lp_solution.bound:
+                        lp_solution = result.solution
+
+        # Bound the PDAC of the instance's batch and find the gap of every PDAC solver to it
+        lower_bound = pdac_lower_bounds(batch, resources, start_time, end_time, max_length, batch_size, lp_solution)['best']
+        for key in keys:
+            if key.split('/')[1].startswith('pdac_'):
+                results[key]['lower_bound'] = lower_bound
+                results[key]['gap'] = optimality_gap(results[key]['objective'], lower_bound)
+
+            if report is not None:
+                report(key, results[key])
+
+    return results
+
+
+
+"""
+----- Compare against a baseline -----
+
+* compare_results -> This function compares the results of a run against a baseline and returns the regressions it found along with
+*   the number of results that were compared
+*
+* INPUTS
+*   results (dict) -> The results of run_suite
+*   baseline (dict) -> The results of an earlier run
+*   time_tolerance (float) -> How much slower (as a fraction) a wall time can be than the baseline before it counts as a regression
+*   memory_tolerance (float) -> How much more (as a fraction) peak Python heap memory can be used than in the baseline before it counts
+*       as a regression
+*   objective_tolerance (float) -> How far an objective value can be from the baseline before it counts as a change
+*
+* ADDITIONAL
+* Each regression is a (key, measurement, baseline value, new value) tuple. Results that are not in the baseline (such as those of another
+* backend) are skipped and not counted, so a count of 0 means that nothing was checked at all. Very short times are noisy, so a wall time also has to be at least a millisecond slower to count
+"""
+def compare_results(results, baseline, time_tolerance=0.1, memory_tolerance=0.1, objective_tolerance=1e-6):
+    regressions = []
+    compared = 0
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        compared += 1
+
+        if result['wall'] > old['wall'] * (1 + time_tolerance) and result['wall'] - old['wall'] > 1e-3:
+            regressions.append((key, 'wall', old['wall'], result['wall']))
+
+        if result['python_peak_memory'] > old['python_peak_memory'] * (1 + memory_tolerance):
+            regressions.append((key, 'python_peak_memory', old['python_peak_memory'], result['python_peak_memory']))
+
+        if abs(result['objective'] - old['objective']) > objective_tolerance * max(1.0, abs(old['objective'])):
+            regressions.append((key, 'objective', old['objective'], result['objective']))
+
+    return (regressions, compared)
+
+
+
+"""
+----- Fingerprint the data -----
+
+* data_fingerprint -> This function returns the SHA-256 hashes of the job and resource data that a run is measured on. A baseline is only
+*   compared against runs with the same fingerprint, since other data gives other batches, times and objective values
+*
+* INPUTS
+*   jobs_path (str) -> The path to the job_data.json file
+*   resources_path (str) -> The path to the resource_data.json file
+"""
+def data_fingerprint(jobs_path, resources_path):
+    return {
+        'jobs_sha256': source_fingerprint(jobs_path, with_hash=True)['source_sha256'],
+        'resources_sha256': source_fingerprint(resources_path, with_hash=True)['source_sha256']
+    }
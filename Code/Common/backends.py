@@ -0,0 +1,438 @@
+"""
+----- Pluggable LP / ILP Solver Backends -----
+
+This program separates building the scheduling models from solving them. The LP and ILP programs describe their model as a LinearModel
+(variables with their bounds and objective coefficients, plus blocks of sparse constraint rows), and a backend turns that description into
+a problem for its solver, solves it and hands back the primal values, the dual values and the objective bound as plain arrays.
+
+There are two backends:
+    - 'cplex' -> IBM CPLEX. This is the solver the project was developed with and the default everywhere
+    - 'highs' -> The open-source HiGHS solver that ships with SciPy (scipy.optimize.linprog and scipy.optimize.milp). It needs no license,
+      so it can run on any machine
+
+Each solver's library is only imported when its backend is used, so a machine only needs the library of the backend it runs.
+"""
+
+import numpy as np
+
+from Common.model_builder import SparseRows
+
+
+"""
+----- Describe a model -----
+
+* LinearModel -> This class holds a minimization model as arrays, without depending on any solver
+*
+* ADDITIONAL
+* Variables are added in blocks with add_variables and are numbered in the order they were added. Constraint rows are added in blocks with
+* add_rows. Each block is a SparseRows object with one sense ('E', 'L' or 'G') for all of its rows and a right hand side for each row
+"""
+class LinearModel:
+    def __init__(self):
+        self.obj = np.zeros(0, dtype=np.float64)
+        self.lb = np.zeros(0, dtype=np.float64)
+        self.ub = np.zeros(0, dtype=np.float64)
+        self.integer = np.zeros(0, dtype=bool)
+        self.names = None
+
+        self.row_blocks = []
+
+
+    """
+    * add_variables -> This function adds a block of variables to the model and returns their indices
+    *
+    * INPUTS
+    *   obj (list) -> The objective coefficient of each variable
+    *   lb (list) -> The lower bound of each variable
+    *   ub (list) -> The upper bound of each variable
+    *   integer (list or bool) -> Whether each variable (or every variable in the block) has to take an integer value
+    *   names (list) -> Optional names of the variables, only used for debugging
+    """
+    def add_variables(self, obj, lb, ub, integer=False, names=None):
+        start = self.num_variables()
+        count = len(obj)
+
+        self.obj = np.concatenate((self.obj, np.asarray(obj, dtype=np.float64)))
+        self.lb = np.concatenate((self.lb, np.asarray(lb, dtype=np.float64)))
+        self.ub = np.concatenate((self.ub, np.asarray(ub, dtype=np.float64)))
+        self.integer = np.concatenate((self.integer, np.broadcast_to(np.asarray(integer, dtype=bool), (count,))))
+
+        if names is not None:
+            self.names = (self.names or [f'v_{i}' for i in range(start)]) + list(names)
+        elif self.names is not None:
+            self.names += [f'v_{i}' for i in range(start, start + count)]
+
+        return np.arange(start, start + count, dtype=np.int64)
+
+
+    """
+    * add_rows -> This function adds a block of constraint rows to the model
+    *
+    * INPUTS
+    *   rows (SparseRows) -> The block of rows
+    *   sense (str) -> The sense of every row ('E', 'L' or 'G')
+    *   rhs (array) -> The right hand side of each row
+    """
+    def add_rows(self, rows, sense, rhs):
+        self.row_blocks.append((rows, sense, np.asarray(rhs, dtype=np.float64)[:len(rows)]))
+
+
+    def num_variables(self):
+        return len(self.obj)
+
+
+    def num_rows(self):
+        return sum(len(rows) for rows, _, _ in self.row_blocks)
+
+
+    def nnz(self):
+        return sum(rows.nnz() for rows, _, _ in self.row_blocks)
+
+
+    """
+    * is_mip -> This function returns whether any of the variables have to take integer values
+    """
+    def is_mip(self):
+        return bool(self.integer.any())
+
+
+    """
+    * stacked_rows -> This function returns every constraint row of the model in a single compressed sparse row block, along with the sense
+    *   and right hand side of each row
+    """
+    def stacked_rows(self):
+        indptr = [np.zeros(1, dtype=np.int64)]
+        offset = 0
+        for rows, _, _ in self.row_blocks:
+            indptr.append(rows.indptr[1:] + offset)
+            offset += rows.nnz()
+
+        indices = np.concatenate([rows.indices for rows, _, _ in self.row_blocks] or [np.zeros(0, dtype=np.int64)])
+        data = np.concatenate([rows.data for rows, _, _ in self.row_blocks] or [np.zeros(0, dtype=np.float64)])
+        senses = np.concatenate([np.full(len(rows), sense) for rows, sense, _ in self.row_blocks] or [np.zeros(0, dtype='<U1')])
+        rhs = np.concatenate([rhs for _, _, rhs in self.row_blocks] or [np.zeros(0, dtype=np.float64)])
+
+        return np.concatenate(indptr), indices, data, senses, rhs
+
+
+
+"""
+----- Hold a solution -----
+
+* Solution -> This class holds what a backend returns after solving a model
+*
+* INPUTS
+*   primal (array) -> The value of every variable, in the order the variables were added
+*   objective (float) -> The objective value of the solution
+*   bound (float) -> The best proven lower bound on the objective. For an LP this is the objective itself
+*   duals (array) -> The dual value of every constraint row, in the order the rows were added. This is None for an ILP
+*   iterations (int) -> The number of simplex (or barrier) iterations that the solver reported, if it reported them
+*   nodes (int) -> The number of branch and bound nodes that the solver reported for an ILP, if it reported them
+"""
+class Solution:
+    def __init__(self, primal, objective, bound, duals=None, iterations=None, nodes=None):
+        self.primal = primal
+        self.objective = objective
+        self.bound = bound
+        self.duals = duals
+        self.iterations = iterations
+        self.nodes = nodes
+
+
+
+"""
+----- Solve with CPLEX -----
+
+* CplexBackend -> This backend solves a model with IBM CPLEX
+*
+* ADDITIONAL
+* The variable types are only passed to CPLEX when some of the variables are integers. Passing them turns the problem into a MIP, and CPLEX
+* only reports dual values for a continuous LP
+"""
+class CplexBackend:
+    name = 'cplex'
+
+    def solve(self, model):
+        session = self.open()
+
+        session.add_variables(model.obj, model.lb, model.ub, model.integer, names=model.names)
+        for rows, sense, rhs in model.row_blocks:
+            session.add_rows(rows, sense, rhs)
+
+        return session.solve()
+
+
+    """
+    * open -> This function returns a session that keeps a CPLEX problem alive so that it can be grown and solved again
+    """
+    def open(self):
+        return CplexSession()
+
+
+
+"""
+----- Keep a CPLEX problem between solves -----
+
+* CplexSession -> This class holds a CPLEX problem that variables and rows can be added to after it has been solved
+*
+* ADDITIONAL
+* CPLEX keeps the basis of the last solve and starts the next solve from it (the advanced start parameter), so a problem that only grew a
+* little since its last solve is re-solved quickly
+"""
+class CplexSession:
+    def __init__(self):
+        import cplex
+
+        self.infinity = cplex.infinity
+        self.problem = cplex.Cplex()
+        self.problem.set_results_stream(None)
+        self.problem.objective.set_sense(self.problem.objective.sense.minimize)
+        self.problem.parameters.advance.set(1)
+
+        self.integer = False
+
+
+    """
+    * add_variables -> This function adds a block of variables to the problem and returns their indices
+    *
+    * INPUTS
+    *   obj (list) -> The objective coefficient of each variable
+    *   lb (list) -> The lower bound of each variable
+    *   ub (list) -> The upper bound of each variable. Infinite bounds are allowed
+    *   integer (list or bool) -> Whether each variable (or every variable in the block) has to take an integer value
+    *   columns (SparseRows) -> Optional coefficients of the new variables in rows that already exist. Row i of the block lists the rows
+    *       and coefficients of variable i
+    *   names (list) -> Optional names of the variables, only used for debugging
+    """
+    def add_variables(self, obj, lb, ub, integer=False, columns=None, names=None):
+        start = self.problem.variables.get_num()
+        count = len(obj)
+
+        integer = np.broadcast_to(np.asarray(integer, dtype=bool), (count,))
+        self.integer = self.integer or bool(integer.any())
+
+        variables = {
+            'obj': np.asarray(obj, dtype=np.float64).tolist(),
+            'lb': np.asarray(lb, dtype=np.float64).tolist(),
+            'ub': np.minimum(np.asarray(ub, dtype=np.float64), self.infinity).tolist()
+        }
+        if self.integer:
+            types = self.problem.variables.type
+            variables['types'] = [types.integer if flag else types.continuous for flag in integer.tolist()]
+        if columns is not None:
+            variables['columns'] = sparse_lists(columns)
+        if names is not None:
+            variables['names'] = list(names)
+        self.problem.variables.add(**variables)
+
+        return np.arange(start, start + count, dtype=np.int64)
+
+
+    """
+    * add_rows -> This function adds a block of constraint rows to the problem with a single call
+    """
+    def add_rows(self, rows, sense, rhs):
+        self.problem.linear_constraints.add(
+            lin_expr=sparse_lists(rows),
+            senses=[sense] * len(rows),
+            rhs=np.asarray(rhs, dtype=np.float64)[:len(rows)].tolist()
+        )
+
+
+    """
+    * solve -> This function solves the problem as it is now and returns its Solution
+    """
+    def solve(self):
+        self.problem.solve()
+
+        solution = self.problem.solution
+        primal = np.array(solution.get_values(), dtype=np.float64)
+        objective = solution.get_objective_value()
+        iterations = solution.progress.get_num_iterations()
+
+        if self.integer:
+            nodes = solution.progress.get_num_nodes_processed()
+            return Solution(primal, objective, solution.MIP.get_best_objective(), iterations=iterations, nodes=nodes)
+
+        duals = np.array(solution.get_dual_values(), dtype=np.float64)
+        return Solution(primal, objective, objective, duals, iterations=iterations)
+
+
+
+"""
+* sparse_lists -> This function turns a block of sparse rows into the [indices, values] lists that CPLEX takes for each row or column
+"""
+def sparse_lists(rows):
+    indptr = rows.indptr.tolist()
+    indices = rows.indices.tolist()
+    data = rows.data.tolist()
+
+    return [[indices[indptr[i]:indptr[i + 1]], data[indptr[i]:indptr[i + 1]]] for i in range(len(rows))]
+
+
+
+"""
+----- Solve with HiGHS -----
+
+* HighsBackend -> This backend solves a model with the HiGHS solver through SciPy
+*
+* ADDITIONAL
+* An LP is solved with scipy.optimize.linprog, which reports the dual values of the rows. 'G' rows are passed to it as negated 'L' rows, so
+* their duals are negated back. A model with integer variables is solved with scipy.optimize.milp, which reports the best bound instead
+"""
+class HighsBackend:
+    name = 'highs'
+
+    def solve(self, model):
+        from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+        from scipy.sparse import csr_matrix
+
+        indptr, indices, data, senses, rhs = model.stacked_rows()
+        matrix = csr_matrix((data, indices, indptr), shape=(len(rhs), model.num_variables()))
+
+        if model.is_mip():
+            lower = np.where(senses == 'L', -np.inf, rhs)
+            upper = np.where(senses == 'G', np.inf, rhs)
+
+            result = milp(
+                model.obj,
+                integrality=model.integer.astype(np.int64),
+                bounds=Bounds(model.lb, model.ub),
+                constraints=LinearConstraint(matrix, lower, upper)
+            )
+            if result.x is None:
+                raise RuntimeError(f"HiGHS could not solve the model: {result.message}")
+
+            bound = getattr(result, 'mip_dual_bound', None)
+            nodes = getattr(result, 'mip_node_count', None)
+            return Solution(np.asarray(result.x), float(result.fun), float(result.fun if bound is None else bound), nodes=nodes)
+
+        equal = senses == 'E'
+        less = ~equal
+        sign = np.where(senses == 'G', -1.0, 1.0)
+
+        result = linprog(
+            model.obj,
+            A_ub=(matrix[less].multiply(sign[less][:, None])).tocsr() if less.any() else None,
+            b_ub=(rhs * sign)[less] if less.any() else None,
+            A_eq=matrix[equal] if equal.any() else None,
+            b_eq=rhs[equal] if equal.any() else None,
+            bounds=np.column_stack((model.lb, model.ub)),
+            method='highs'
+        )
+        if result.status != 0:
+            raise RuntimeError(f"HiGHS could not solve the model: {result.message}")
+
+        duals = np.zeros(len(rhs), dtype=np.float64)
+        if less.any():
+            duals[less] = result.ineqlin.marginals * sign[less]
+        if equal.any():
+            duals[equal] = result.eqlin.marginals
+
+        return Solution(np.asarray(result.x), float(result.fun), float(result.fun), duals, iterations=int(result.nit))
+
+
+    """
+    * open -> This function returns a session that can be grown between solves. HiGHS is solved from scratch every time
+    """
+    def open(self):
+        return ColdSession(self)
+
+
+
+"""
+----- Grow a model between cold solves -----
+
+* ColdSession -> This class offers the same interface as CplexSession for backends that cannot keep a problem between solves. It collects
+*   the variables and rows, and hands the whole model to its backend on every solve
+*
+* INPUTS
+*   backend (backend) -> The backend that solves the model
+"""
+class ColdSession:
+    def __init__(self, backend):
+        self.backend = backend
+        self.model = LinearModel()
+
+        # Every coefficient of the model as a (row, column, value) entry
+        self.entry_rows = []
+        self.entry_columns = []
+        self.entry_values = []
+        self.senses = []
+        self.rhs = []
+
+
+    def add_variables(self, obj, lb, ub, integer=False, columns=None, names=None):
+        indices = self.model.add_variables(obj, lb, ub, integer, names)
+
+        if columns is not None:
+            self.entry_rows.append(columns.indices)
+            self.entry_columns.append(np.repeat(indices, np.diff(columns.indptr)))
+            self.entry_values.append(columns.data)
+
+        return indices
+
+
+    def add_rows(self, rows, sense, rhs):
+        start = len(self.senses)
+
+        self.entry_rows.append(np.repeat(np.arange(start, start + len(rows), dtype=np.int64), np.diff(rows.indptr)))
+        self.entry_columns.append(rows.indices)
+        self.entry_values.append(rows.data)
+        self.senses += [sense] * len(rows)
+        self.rhs += np.asarray(rhs, dtype=np.float64)[:len(rows)].tolist()
+
+
+    def solve(self):
+        # Sort the entries by row to get compressed sparse rows
+        rows = np.concatenate(self.entry_rows)
+        order = np.argsort(rows, kind='stable')
+        indices = np.concatenate(self.entry_columns)[order]
+        data = np.concatenate(self.entry_values)[order]
+
+        indptr = np.zeros(len(self.senses) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self.senses)), out=indptr[1:])
+
+        # Split the rows into blocks of rows with the same sense, keeping their order
+        self.model.row_blocks = []
+        senses = np.array(self.senses)
+        rhs = np.array(self.rhs, dtype=np.float64)
+        breaks = np.flatnonzero(senses[1:] != senses[:-1]) + 1
+        for first, last in zip(np.concatenate(([0], breaks)), np.concatenate((breaks, [len(senses)]))):
+            block = SparseRows(indptr[first:last + 1] - indptr[first], indices[indptr[first]:indptr[last]], data[indptr[first]:indptr[last]])
+            self.model.add_rows(block, senses[first], rhs[first:last])
+
+        return self.backend.solve(self.model)
+
+
+
+BACKENDS = {
+    'cplex': CplexBackend,
+    'highs': HighsBackend,
+}
+
+
+"""
+----- Pick a backend -----
+
+* get_backend -> This function returns the backend with the given name. A backend object is returned as it is
+*
+* INPUTS
+*   backend (str or backend) -> 'cplex', 'highs' or a backend object
+"""
+def get_backend(backend):
+    if not isinstance(backend, str):
+        return backend
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown solver backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+
+    return BACKENDS[backend]()
+
+
+
+"""
+* solve_model -> This function solves a model with the given backend and returns its Solution
+"""
+def solve_model(model, backend='cplex'):
+    return get_backend(backend).solve(model)
@@ -0,0 +1,147 @@
+"""
+----- Certified Lower Bounds on the PDAC -----
+
+This program computes lower bounds on the smallest PDAC that any schedule of a batch can reach, without solving the ILP. The PDAC of a
+schedule is at least its height above the resource curve at every single time step, so it is also at least the average height above the
+curve over any window of time steps. Each bound below uses some load that every schedule has to place somewhere:
+    - The window energy bound. Every job that can only run inside a window [a, b) adds its whole area to that window. The area of those
+      jobs minus the resources of the window, divided by the length of the window, is a lower bound. Every window is checked at once
+    - The compulsory part bound. A job whose latest start is before its earliest end runs between those two times in every schedule. The
+      height of those compulsory parts above the resource curve is a lower bound
+    - The LP bound. The relaxed LP is solved over every schedule and more, so its proven lower bound is also a lower bound on the PDAC
+
+The best of the bounds gives an optimality gap for the schedules of the greedy, naive and LP algorithms at batch sizes where the ILP is
+far too slow to solve.
+"""
+
+import numpy as np
+
+from Common.job_store import generate_jobs
+from Common.intervals import get_job_intervals
+from Common.profile import height_profiles, pdac_objectives
+
+
+"""
+----- Bound over every window -----
+
+* window_energy_bound -> This function returns the largest average height above the resource curve that is forced into any window of
+*   time steps by the jobs that can only run inside of that window
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   height (list) -> The height of each job
+*   resources (list) -> The amount of available resources at each discrete time step
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*
+* ADDITIONAL
+* Job j can only run inside of [a, b) when its earliest start is at least a and its latest end is at most b. A positive bound only gets
+* larger when a window is shrunk to the earliest start and latest end of the jobs inside of it (as long as the resources are not negative),
+* so only windows that start at an earliest start and end at a latest end are checked. The area of the jobs inside of each of those
+* windows comes from one two dimensional prefix sum, and the resources of each window from a prefix sum over the resource curve
+"""
+def window_energy_bound(intervals, height, resources, num_time_steps):
+    jobs = np.flatnonzero(intervals.count > 0)
+    if len(jobs) == 0:
+        return 0.0
+
+    earliest = intervals.first_start[jobs]
+    latest = intervals.last_start[jobs] + intervals.length[jobs]
+    area = np.asarray(height, dtype=np.float64)[jobs] * intervals.length[jobs]
+
+    # The candidate window starts and ends, and the position of each job's earliest start and latest end among them
+    starts, start_index = np.unique(earliest, return_inverse=True)
+    ends, end_index = np.unique(latest, return_inverse=True)
+
+    # grid[i, k] is the area of the jobs whose earliest start is starts[i] and whose latest end is ends[k]. Summing it over the starts from
+    # i onwards and the ends up to k gives the area of the jobs inside of [starts[i], ends[k])
+    grid = np.zeros((len(starts), len(ends)), dtype=np.float64)
+    np.add.at(grid, (start_index, end_index), area)
+    inside = np.cumsum(np.cumsum(grid[::-1], axis=0)[::-1], axis=1)
+
+    prefix = np.concatenate(([0.0], np.cumsum(np.asarray(resources[:num_time_steps], dtype=np.float64))))
+    window_resources = prefix[ends][None, :] - prefix[starts][:, None]
+    window_length = ends[None, :] - starts[:, None]
+
+    valid = window_length > 0
+    average = np.where(valid, (inside - window_resources) / np.where(valid, window_length, 1), -np.inf)
+
+    return max(float(average.max()), 0.0)
+
+
+
+"""
+----- Bound from the compulsory parts -----
+
+* compulsory_part_bound -> This function returns the PDAC of the parts of the jobs that run at the same time steps in every schedule
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   height (list) -> The height of each job
+*   resources (list) -> The amount of available resources at each discrete time step
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*
+* ADDITIONAL
+* Every schedule runs job j during [last_start[j], first_start[j] + length[j]) if that range is not empty
+"""
+def compulsory_part_bound(intervals, height, resources, num_time_steps):
+    starts = intervals.last_start
+    ends = np.maximum(intervals.first_start + intervals.length, starts)
+
+    profile = height_profiles(starts, ends, height, num_time_steps)
+
+    return float(pdac_objectives(profile, resources))
+
+
+
+"""
+----- Combine the bounds -----
+
+* pdac_lower_bounds -> This function returns every lower bound on the PDAC of a batch as a dictionary, along with the best of them
+*
+* INPUTS
+*   jobs_array (JobStore or list) -> An unfiltered store or list of all of the possible jobs available for scheduling
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   start_time (int) -> The earliest possible starting time for each job
+*   end_time (int) -> The latest possible ending time for each job
+*   max_length (int) -> The maximum length of a given job
+*   batch_size (int) -> The number of jobs that should be included in the schedule
+*   lp_solution (Solution) -> The solution of the batch's relaxed PDAC LP, if one has already been solved
+*
+* ADDITIONAL
+* The dictionary holds 'window', 'compulsory', 'lp' (only when an LP solution is given) and 'best'. The batch is picked the same way as
+* in every solve_* function, so the bounds hold for the schedules those functions return
+"""
+def pdac_lower_bounds(jobs_array, resources, start_time, end_time, max_length, batch_size, lp_solution=None):
+    num_time_steps = end_time - start_time
+
+    jobs = generate_jobs(jobs_array, start_time, end_time, max_length, batch_size)
+    intervals = get_job_intervals(jobs, start_time)
+
+    bounds = {
+        'window': window_energy_bound(intervals, jobs.height, resources, num_time_steps),
+        'compulsory': compulsory_part_bound(intervals, jobs.height, resources, num_time_steps)
+    }
+    if lp_solution is not None:
+        bounds['lp'] = float(lp_solution.bound)
+
+    bounds['best'] = max(bounds.values())
+
+    return bounds
+
+
+
+"""
+* optimality_gap -> This function returns how far an objective value is above a lower bound, as a fraction of the objective value
+*
+* INPUTS
+*   objective (float) -> The PDAC of a schedule
+*   lower_bound (float) -> A lower bound on the PDAC of every schedule of the same batch
+*
+* ADDITIONAL
+* A schedule with a PDAC of 0 is optimal, so its gap is 0
+"""
+def optimality_gap(objective, lower_bound):
+    if objective <= 0:
+        return 0.0
+
+    return max(objective - lower_bound, 0.0) / objective
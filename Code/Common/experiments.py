@@ -0,0 +1,278 @@
+"""
+----- Parallel Trial Runner -----
+
+This program runs the trials of an analysis (every algorithm on every trial of every batch size) across a pool of worker processes. The
+work is split into one task per (batch size, trial, algorithm), so even a single slow LP or ILP never holds up the other cores.
+
+Every trial draws its batch from its own random number generator, seeded from (run seed, batch size, trial). Every algorithm of a trial
+therefore schedules the same batch, and the results do not depend on how many workers there are or the order in which the tasks finish.
+The rows come back in order of batch size and trial as soon as each trial is complete, with the same columns as the CSV files in
+Output_Data/Final_PDAC_Results. Each row can also hold the best lower bound on the PDAC of its batch (see bounds) and the optimality gap
+of every PDAC algorithm to it.
+"""
+
+import csv
+import importlib
+import multiprocessing
+import os
+import time
+import zlib
+
+import numpy as np
+
+from Common.bounds import pdac_lower_bounds, optimality_gap
+from Common.job_index import JobIndex
+from Common.shared_arrays import SharedJobData
+
+
+"""
+----- The algorithms that can be run -----
+
+Each algorithm maps to the module and function that runs it, the CSV columns of its objective value and run time, and whether it takes a
+random number generator. The column names match the existing result files, including the spelling of 'naive obective val'
+"""
+ALGORITHMS = {
+    'exact': ('PDAC.pdac_scheduling_ilp', 'solve_pdac_ilp', 'exact objective val', 'exact time', False),
+    'naive': ('PDAC.pdac_scheduling_naive', 'solve_pdac_naive', 'naive obective val', 'naive time', False),
+    'inexact': ('PDAC.pdac_scheduling_lp', 'solve_pdac_lp', 'inexact objective val', 'inexact time', True),
+    'greedy': ('PDAC.pdac_scheduling_greedy', 'solve_pdac_greedy', 'greedy objective val', 'greedy time', False),
+    'aac exact': ('AAC.aac_scheduling_ilp', 'solve_aac_ilp', 'aac exact objective val', 'aac exact time', False),
+    'aac inexact': ('AAC.aac_scheduling_lp', 'solve_aac_lp', 'aac inexact objective val', 'aac inexact time', True),
+    'aac greedy': ('AAC.aac_scheduling_greedy', 'solve_aac_greedy', 'aac greedy objective val', 'aac greedy time', False),
+}
+
+# The algorithm whose task also computes the lower bound of its trial when it is run. Its relaxed LP solution gives the tightest bound
+BOUND_ALGORITHM = 'inexact'
+
+# The state that every worker process sets up once, before it runs any tasks
+_worker = {}
+
+
+
+"""
+----- Seed each trial -----
+
+* trial_seed -> This function returns the seed sequence of a single trial, or of a single algorithm within a trial
+*
+* INPUTS
+*   seed (int) -> The seed of the whole run
+*   batch_size (int) -> The batch size of the trial
+*   trial (int) -> The number of the trial within its batch size
+*   algorithm (str) -> The algorithm, if the seed is for the algorithm's own random choices rather than for drawing the batch
+*
+* ADDITIONAL
+* An algorithm is identified by a checksum of its name, so adding algorithms to ALGORITHMS never changes the seeds of the others
+"""
+def trial_seed(seed, batch_size, trial, algorithm=None):
+    entropy = [seed, batch_size, trial]
+    if algorithm is not None:
+        entropy.append(zlib.crc32(algorithm.encode()))
+
+    return np.random.SeedSequence(entropy)
+
+
+
+"""
+----- Run a single task -----
+
+* init_worker -> This function sets up a worker process with the job index and resource curve that every one of its tasks uses
+*
+* INPUTS
+*   jobs (JobStore or list) -> All of the jobs that batches are drawn from
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   window (tuple) -> The (start_time, end_time, max_length) of every batch
+*   seed (int) -> The seed of the whole run
+"""
+def init_worker(jobs, resources, window, seed):
+    _worker['index'] = JobIndex(jobs)
+    _worker['resources'] = resources
+    _worker['window'] = window
+    _worker['seed'] = seed
+
+
+
+"""
+* attach_worker -> This function sets up a worker process from the shared block that holds the jobs and the resource curve, so that the
+*   worker reads them in place instead of getting its own copy
+*
+* INPUTS
+*   description (dict) -> The description of the shared block (see SharedJobData)
+*   window (tuple) -> The (start_time, end_time, max_length) of every batch
+*   seed (int) -> The seed of the whole run
+"""
+def attach_worker(description, window, seed):
+    shared = SharedJobData.attach(description)
+    _worker['shared'] = shared
+
+    init_worker(shared.jobs, shared.resources, window, seed)
+
+
+
+"""
+* run_task -> This function draws the batch of one trial, runs one algorithm on it and returns the algorithm's objective value, run time
+*   and lower bound along with the task it belongs to
+*
+* INPUTS
+*   task (tuple) -> The (batch_size, trial, algorithm, bound) to run, where bound is whether the task also computes the best lower bound
+*       on the PDAC of the batch
+*
+* ADDITIONAL
+* Only the time spent in the algorithm itself is measured, not drawing the batch or computing the bound. An algorithm that returns more
+* than one value (such as the schedule's heights) has its first value used as the objective. The lower bound is None if it was not
+* computed, and includes the bound of the relaxed LP when the algorithm is BOUND_ALGORITHM
+"""
+def run_task(task):
+    batch_size, trial, algorithm, bound = task
+    start_time, end_time, max_length = _worker['window']
+    seed = _worker['seed']
+
+    module_name, function_name, _, _, takes_rng = ALGORITHMS[algorithm]
+    solve = getattr(importlib.import_module(module_name), function_name)
+
+    batch = _worker['index'].sample(start_time, end_time, max_length, batch_size, np.random.default_rng(trial_seed(seed, batch_size, trial)))
+
+    options = {}
+    if takes_rng:
+        options['rng'] = np.random.default_rng(trial_seed(seed, batch_size, trial, algorithm))
+
+    start = time.perf_counter()
+    result = solve(batch, _worker['resources'], start_time, end_time, max_length, batch_size, **options)
+    elapsed = time.perf_counter() - start
+
+    objective = result[0] if isinstance(result, tuple) else result
+
+    # Bound the PDAC of the batch, with the LP's own bound when this task solved the relaxed LP
+    lower_bound = None
+    if bound:
+        lp_solution = result.solution if algorithm == BOUND_ALGORITHM else None
+        lower_bound = pdac_lower_bounds(batch, _worker['resources'], start_time, end_time, max_length, batch_size, lp_solution)['best']
+
+    return (batch_size, trial, algorithm, float(objective), elapsed, lower_bound)
+
+
+
+"""
+----- Run the trials -----
+
+* iter_trials -> This function runs every algorithm on every trial of every batch size and yields one result row per trial, in order of
+*   batch size and then trial
+*
+* INPUTS
+*   jobs (JobStore or list) -> All of the jobs that batches are drawn from
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   start_time (int) -> The earliest possible starting time for each job
+*   end_time (int) -> The latest possible ending time for each job
+*   max_length (int) -> The maximum length of a given job
+*   batch_sizes (list) -> The batch sizes to run
+*   trials (int) -> The number of trials of each batch size
+*   algorithms (list) -> The names of the algorithms to run (keys of ALGORITHMS), in the order of their CSV columns
+*   seed (int) -> The seed of the whole run
+*   processes (int) -> The number of worker processes. By default there is one per core. With 1, every task runs in this process
+*   bounds (bool) -> Whether to add the lower bound and the gap of every PDAC algorithm to each row
+*
+* ADDITIONAL
+* Each row is a dictionary with 'batch size', 'trial #' and the objective value and time column of every algorithm. With bounds, it also
+* holds 'lower bound' and a gap column (see gap_column) for every PDAC algorithm. The bound is computed by the task of BOUND_ALGORITHM if
+* it is run, and by the task of the last algorithm otherwise
+"""
+def iter_trials(jobs, resources, start_time, end_time, max_length, batch_sizes, trials, algorithms=('naive', 'inexact', 'greedy'), seed=0, processes=None, bounds=True):
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{algorithm}'. The algorithms are {', '.join(ALGORITHMS)}")
+
+    bound_algorithm = None
+    if bounds:
+        bound_algorithm = BOUND_ALGORITHM if BOUND_ALGORITHM in algorithms else algorithms[-1]
+
+    tasks = [(batch_size, trial, algorithm, algorithm == bound_algorithm)
+             for batch_size in batch_sizes for trial in range(trials) for algorithm in algorithms]
+    window = (start_time, end_time, max_length)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes == 1:
+        init_worker(jobs, resources, window, seed)
+        yield from collect_rows(map(run_task, tasks), algorithms)
+        return
+
+    # The workers attach to one shared copy of the jobs and the resource curve
+    # imap hands back the results in the order of the tasks, while the workers run them in any order
+    with SharedJobData.create(jobs, resources) as shared:
+        with multiprocessing.Pool(processes, initializer=attach_worker, initargs=(shared.description(), window, seed)) as pool:
+            yield from collect_rows(pool.imap(run_task, tasks), algorithms)
+
+
+
+"""
+* collect_rows -> This function groups the ordered task results of each trial into a single result row
+*
+* INPUTS
+*   results (iterable) -> The results of run_task, in the order of the tasks
+*   algorithms (list) -> The algorithms of every trial, in the order of their tasks
+"""
+def collect_rows(results, algorithms):
+    row = None
+    for batch_size, trial, algorithm, objective, elapsed, lower_bound in results:
+        if row is None:
+            row = {'batch size': batch_size, 'trial #': trial}
+
+        _, _, objective_column, time_column, _ = ALGORITHMS[algorithm]
+        row[objective_column] = objective
+        row[time_column] = elapsed
+
+        if lower_bound is not None:
+            row['lower bound'] = lower_bound
+
+        # The last algorithm of a trial completes its row, along with the gap of every PDAC algorithm once the bound is known
+        if algorithm == algorithms[-1]:
+            if 'lower bound' in row:
+                for name in algorithms:
+                    if gap_column(name) is not None:
+                        row[gap_column(name)] = optimality_gap(row[ALGORITHMS[name][2]], row['lower bound'])
+
+            yield row
+            row = None
+
+
+
+"""
+* gap_column -> This function returns the CSV column of an algorithm's optimality gap, or None for the AAC algorithms, whose objective is
+*   not the PDAC
+"""
+def gap_column(algorithm):
+    if algorithm.startswith('aac'):
+        return None
+
+    return f'{algorithm} gap'
+
+
+
+"""
+* run_trials -> This function runs the trials like iter_trials, writes every row to a CSV file as soon as its trial is complete, and
+*   returns all of the rows
+*
+* INPUTS
+*   path (str) -> The path of the CSV file. Its header is written first, and any existing file is replaced
+*   The other inputs are the same as for iter_trials
+"""
+def run_trials(path, jobs, resources, start_time, end_time, max_length, batch_sizes, trials, algorithms=('naive', 'inexact', 'greedy'), seed=0, processes=None, bounds=True):
+    fieldnames = ['batch size', 'trial #']
+    for algorithm in algorithms:
+        fieldnames += [ALGORITHMS[algorithm][2], ALGORITHMS[algorithm][3]]
+
+    if bounds:
+        fieldnames.append('lower bound')
+        fieldnames += [gap_column(algorithm) for algorithm in algorithms if gap_column(algorithm) is not None]
+
+    rows = []
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+
+        for row in iter_trials(jobs, resources, start_time, end_time, max_length, batch_sizes, trials, algorithms, seed, processes, bounds):
+            writer.writerow(row)
+            csvfile.flush()
+            rows.append(row)
+
+    return rows
@@ -0,0 +1,101 @@
+"""
+----- Implicit Job Intervals -----
+
+This program describes every interval that each job could possibly run within without listing them one by one. A job that is released at
+time a, has a deadline of d and runs for l time steps can start at any time step between a and d - l. So instead of storing a (start, end)
+tuple for every one of those starts, each job is described by its first start, its last start and its length. The individual intervals are
+only produced on demand for the few places that really need them.
+"""
+
+import numpy as np
+
+
+"""
+----- Store the job intervals as ranges -----
+
+* JobIntervals -> This class holds the range of possible start times of every job in a batch
+*
+* INPUTS
+*   first_start (array) -> The earliest time step that each job can start at
+*   last_start (array) -> The latest time step that each job can start at
+*   length (array) -> The number of time steps that each job runs for
+*
+* ADDITIONAL
+* Job j can run within the intervals (s, s + length[j]) for every s from first_start[j] to last_start[j]. If last_start[j] is smaller than
+* first_start[j] the job has no intervals at all.
+* The intervals of all jobs are numbered one after another, job by job. The intervals of job j are numbers offsets[j] to offsets[j + 1] - 1
+"""
+class JobIntervals:
+    def __init__(self, first_start, last_start, length):
+        self.first_start = np.ascontiguousarray(first_start, dtype=np.int64)
+        self.last_start = np.ascontiguousarray(last_start, dtype=np.int64)
+        self.length = np.ascontiguousarray(length, dtype=np.int64)
+
+        # Count the intervals of each job and where each job's intervals begin in the overall numbering
+        self.count = np.maximum(self.last_start - self.first_start + 1, 0)
+        self.offsets = np.zeros(len(self.count) + 1, dtype=np.int64)
+        np.cumsum(self.count, out=self.offsets[1:])
+
+
+    def __len__(self):
+        return len(self.first_start)
+
+
+    """
+    * num_intervals -> This function returns the total number of intervals across all jobs
+    """
+    def num_intervals(self):
+        return int(self.offsets[-1])
+
+
+    """
+    * starts -> This function returns every possible start time of a single job as an array
+    """
+    def starts(self, job_id):
+        return np.arange(self.first_start[job_id], self.last_start[job_id] + 1)
+
+
+    """
+    * job_intervals -> This function yields every (start, end) interval of a single job, in order of their start times
+    """
+    def job_intervals(self, job_id):
+        length = int(self.length[job_id])
+        for start in range(int(self.first_start[job_id]), int(self.last_start[job_id]) + 1):
+            yield (start, start + length)
+
+
+    """
+    * interval_jobs -> This function returns the job that each interval belongs to, for every interval in the overall numbering
+    """
+    def interval_jobs(self):
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.count)
+
+
+    """
+    * interval_starts -> This function returns the start time of every interval in the overall numbering
+    """
+    def interval_starts(self):
+        jobs = self.interval_jobs()
+
+        return self.first_start[jobs] + (np.arange(self.num_intervals(), dtype=np.int64) - self.offsets[jobs])
+
+
+
+"""
+----- Generate the job intervals -----
+
+* get_job_intervals -> This function returns the range of intervals that each job could possibly run within
+*
+* INPUTS
+*   jobs (JobStore) -> The jobs in this trial
+*   start_time (int) -> The earliest possible starting time for each job
+*
+* ADDITIONAL
+* The start_time is subtracted from the starting and ending time of each job so that the earliest starting times of the job is 0. This makes
+* future processing and indexing simpler
+"""
+def get_job_intervals(jobs, start_time):
+    first_start = jobs.release - start_time
+    last_start = jobs.deadline - start_time - jobs.length
+
+    return JobIntervals(first_start, last_start, jobs.length)
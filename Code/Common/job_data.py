@@ -0,0 +1,201 @@
+"""
+----- Binary Job Dataset Cache -----
+
+This program loads the job dataset (job_data.json) into a job store. Parsing the ~88,000 job objects out of JSON dominates the startup
+time of every experiment, so the first load converts the dataset into a compact binary cache file that sits next to the JSON file.
+Every later load opens the cache with a read-only memory map, so no parsing or copying is done at all. The cache is rebuilt whenever
+the JSON file changes.
+
+Cache file layout
+    - 8 byte magic string, followed by a fixed size block holding a JSON header (job count, column offsets and the source file's
+      size, modification time and hash)
+    - Each job column stored contiguously, starting at the offset recorded in the header
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from Common.job_store import JobStore
+
+
+CACHE_MAGIC = b'JOBCACHE'
+CACHE_VERSION = 1
+HEADER_SIZE = 4096
+COLUMN_ALIGNMENT = 64
+
+COLUMN_DTYPES = {
+    'job_id': '<i8',
+    'release': '<i8',
+    'deadline': '<i8',
+    'length': '<i8',
+    'height': '<f8',
+}
+
+
+"""
+----- Load the job dataset -----
+
+* load_jobs -> This function returns every job in the dataset as a job store whose columns are memory mapped from the binary cache
+*
+* INPUTS
+*   path (str) -> The path to the job_data.json file
+*   cache_path (str) -> The path of the binary cache. By default it is the JSON path with a .jobcache extension
+*
+* ADDITIONAL
+* The columns of the returned store are read-only. Use take() to get a writable copy of a subset of the jobs
+"""
+def load_jobs(path, cache_path=None):
+    if cache_path is None:
+        cache_path = os.path.splitext(path)[0] + '.jobcache'
+
+    header = read_cache_header(cache_path)
+    if header is None or not cache_matches_source(header, cache_path, path):
+        build_job_cache(path, cache_path)
+        header = read_cache_header(cache_path)
+
+    # Memory map each column straight out of the cache file
+    columns = {}
+    for field, column in header['columns'].items():
+        columns[field] = np.memmap(cache_path, dtype=column['dtype'], mode='r', offset=column['offset'], shape=(header['count'],))
+
+    return JobStore(columns['release'], columns['deadline'], columns['length'], columns['height'], columns['job_id'])
+
+
+
+"""
+----- Build the binary cache -----
+
+* build_job_cache -> This function parses job_data.json once and writes its jobs to the binary cache file
+*
+* INPUTS
+*   path (str) -> The path to the job_data.json file
+*   cache_path (str) -> The path that the cache file is written to
+*
+* ADDITIONAL
+* The cache is written to a temporary file first and then moved into place, so a worker that loads the jobs at the same time never sees
+* a half written cache
+"""
+def build_job_cache(path, cache_path):
+    with open(path, 'r') as file:
+        data = json.load(file)
+
+    jobs = JobStore.from_dicts(data['jobs'])
+
+    # Lay the columns out one after another, each starting on an aligned offset
+    offset = len(CACHE_MAGIC) + HEADER_SIZE
+    columns = {}
+    for field, dtype in COLUMN_DTYPES.items():
+        offset = -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+        columns[field] = {'dtype': dtype, 'offset': offset}
+        offset += len(jobs) * np.dtype(dtype).itemsize
+
+    header = {'version': CACHE_VERSION, 'count': len(jobs), 'columns': columns}
+    header.update(source_fingerprint(path, with_hash=True))
+
+    temp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(CACHE_MAGIC)
+        file.write(encode_header(header))
+
+        for field, column in columns.items():
+            file.seek(column['offset'])
+            file.write(np.ascontiguousarray(getattr(jobs, field), dtype=column['dtype']).tobytes())
+
+    os.replace(temp_path, cache_path)
+
+
+
+"""
+----- Check whether the cache is still valid -----
+
+* cache_matches_source -> This function checks whether the cache was built from the current version of the JSON file
+*
+* INPUTS
+*   header (dict) -> The header read from the cache file
+*   cache_path (str) -> The path of the cache file
+*   path (str) -> The path to the job_data.json file
+*
+* ADDITIONAL
+* The size and modification time are checked first because they are free. If only the modification time changed (for example because
+* the file was copied), the contents are hashed and the cache is kept if the hash still matches. The header is then updated with the new
+* modification time so the file does not have to be hashed again
+"""
+def cache_matches_source(header, cache_path, path):
+    if header.get('version') != CACHE_VERSION:
+        return False
+
+    fingerprint = source_fingerprint(path)
+    if fingerprint['source_size'] != header['source_size']:
+        return False
+
+    if fingerprint['source_mtime_ns'] == header['source_mtime_ns']:
+        return True
+
+    fingerprint = source_fingerprint(path, with_hash=True)
+    if fingerprint['source_sha256'] != header['source_sha256']:
+        return False
+
+    header.update(fingerprint)
+    with open(cache_path, 'r+b') as file:
+        file.seek(len(CACHE_MAGIC))
+        file.write(encode_header(header))
+
+    return True
+
+
+
+"""
+* source_fingerprint -> This function returns the size, modification time and (optionally) the SHA-256 hash of the JSON file
+"""
+def source_fingerprint(path, with_hash=False):
+    stat = os.stat(path)
+    fingerprint = {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        fingerprint['source_sha256'] = digest.hexdigest()
+
+    return fingerprint
+
+
+
+"""
+* read_cache_header -> This function returns the header of the cache file, or None if there is no usable cache file
+*
+* INPUTS
+*   cache_path (str) -> The path of the cache file
+*   magic (bytes) -> The magic string that the cache file has to start with. Other binary caches (see resource_curve) pass their own
+"""
+def read_cache_header(cache_path, magic=CACHE_MAGIC):
+    try:
+        with open(cache_path, 'rb') as file:
+            found = file.read(len(magic))
+            block = file.read(HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+
+    if found != magic or len(block) != HEADER_SIZE:
+        return None
+
+    try:
+        return json.loads(block.rstrip(b' ').decode('ascii'))
+    except ValueError:
+        return None
+
+
+
+"""
+* encode_header -> This function turns the header into a fixed size block so that it can be rewritten in place
+"""
+def encode_header(header):
+    block = json.dumps(header).encode('ascii')
+    if len(block) > HEADER_SIZE:
+        raise ValueError("The job cache header does not fit in its reserved block")
+
+    return block.ljust(HEADER_SIZE, b' ')
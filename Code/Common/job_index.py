@@ -0,0 +1,107 @@
+"""
+----- Job Window Index -----
+
+This program builds an index over the full job dataset so that batches of jobs can be drawn without rescanning every job on every trial.
+The jobs are sorted by their release time once. For a given time window, the jobs that are allowed to run inside of it are found with two
+binary searches on the release times, which bound the jobs released inside the window, followed by a deadline and length filter on only
+those jobs, and the result is remembered for the next trial.
+Counting the eligible jobs is then free and drawing a random batch of k jobs only costs time proportional to k.
+"""
+
+import numpy as np
+from collections import OrderedDict
+
+from Common.job_store import JobStore
+
+
+"""
+----- Index the jobs by release time -----
+
+* JobIndex -> This class keeps the jobs sorted by their release time and remembers which jobs are eligible for each requested window
+*
+* INPUTS
+*   jobs (JobStore or list) -> All of the jobs available to the user
+*   max_windows (int) -> The number of different windows whose eligible jobs are remembered at the same time
+*
+* ADDITIONAL
+* A job is eligible for a window if it is released at or after start_time, has its deadline at or before end_time and is no longer
+* than max_length. This is the same rule that generate_jobs uses
+"""
+class JobIndex:
+    def __init__(self, jobs, max_windows=16):
+        if not isinstance(jobs, JobStore):
+            jobs = JobStore.from_dicts(jobs)
+
+        self.jobs = jobs
+        self.max_windows = max_windows
+
+        # Sort the jobs by release time once so that every window only has to look at the jobs released inside of it
+        self.order = np.argsort(jobs.release, kind='stable')
+        self.sorted_release = jobs.release[self.order]
+
+        # The shortest time between the release and deadline of any job. A job whose deadline is at or before end_time must then be
+        # released at or before end_time - min_span
+        self.min_span = int((jobs.deadline - jobs.release).min()) if len(jobs) else 0
+
+        self._windows = OrderedDict()
+
+
+    """
+    * eligible -> This function returns the indices (into the indexed jobs) of every job that is eligible for the window, in ascending order
+    """
+    def eligible(self, start_time, end_time, max_length):
+        key = (start_time, end_time, max_length)
+        if key in self._windows:
+            self._windows.move_to_end(key)
+            return self._windows[key]
+
+        # Only the jobs released at or after start_time, and early enough to have their deadline by end_time, can be eligible
+        first = np.searchsorted(self.sorted_release, start_time, side='left')
+        last = np.searchsorted(self.sorted_release, end_time - self.min_span, side='right')
+        candidates = self.order[first:max(first, last)]
+
+        # Filter those jobs by their deadline and length
+        mask = (self.jobs.deadline[candidates] <= end_time) & (self.jobs.length[candidates] <= max_length)
+        eligible = np.sort(candidates[mask])
+        eligible.flags.writeable = False
+
+        # Remember the window and forget the least recently used one if there are too many
+        self._windows[key] = eligible
+        if len(self._windows) > self.max_windows:
+            self._windows.popitem(last=False)
+
+        return eligible
+
+
+    """
+    * count -> This function returns the number of jobs that are eligible for the window
+    """
+    def count(self, start_time, end_time, max_length):
+        return len(self.eligible(start_time, end_time, max_length))
+
+
+    """
+    * sample -> This function draws a random batch of eligible jobs and returns it as a job store
+    *
+    * INPUTS
+    *   start_time (int) -> The time after which all jobs must start
+    *   end_time (int) -> The time by which all jobs must end
+    *   max_length (int) -> The maximum duration of a given job
+    *   batch_size (int) -> The size of the batch
+    *   rng (numpy Generator or int) -> The random number generator (or seed) used to draw the batch
+    *
+    * ADDITIONAL
+    * The jobs in the batch are in random order and are given the ids 0 through batch_size - 1. Passing the batch to any solve_* function
+    * with the same window and batch_size schedules exactly these jobs, so every algorithm in a trial sees the same batch.
+    * Any prefix of the batch is also a random batch, which is how nested batch sizes can be drawn with a single call
+    """
+    def sample(self, start_time, end_time, max_length, batch_size, rng=None):
+        eligible = self.eligible(start_time, end_time, max_length)
+
+        if len(eligible) < batch_size:
+            raise ValueError(f"Only {len(eligible)} jobs fall within the window, but a batch of {batch_size} was requested")
+
+        rng = np.random.default_rng(rng)
+        chosen = eligible[rng.choice(len(eligible), size=batch_size, replace=False)]
+
+        return self.jobs.take(chosen).renumbered()
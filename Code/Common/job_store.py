@@ -0,0 +1,148 @@
+"""
+----- Columnar Job Store -----
+
+This program holds the job store that is shared by every scheduling algorithm in the PDAC and AAC folders. Instead of creating a new dictionary
+for every job in a batch, the release, deadline, length, height and id of each job are kept in their own contiguous NumPy column.
+Every algorithm reads these columns directly, which avoids building thousands of small dictionaries and looking up their fields one at a time.
+"""
+
+import numpy as np
+
+
+"""
+----- Store the jobs as columns -----
+
+* JobStore -> This class keeps each field of a list of jobs in its own NumPy array. Index i of every column belongs to the same job
+*
+* INPUTS
+*   release (array) -> The earliest time step that each job can start at
+*   deadline (array) -> The time step by which each job must be finished
+*   length (array) -> The number of time steps that each job runs for
+*   height (array) -> The amount of power that each job uses while it is running
+*   job_id (array) -> The id of each job. If this is not given the jobs are numbered 0, 1, 2, ... in order
+*
+* ADDITIONAL
+* The columns are never copied unless they have the wrong data type, so a store can be built directly on top of existing arrays
+"""
+class JobStore:
+    fields = ('job_id', 'release', 'deadline', 'length', 'height')
+
+    def __init__(self, release, deadline, length, height, job_id=None):
+        self.release = np.ascontiguousarray(release, dtype=np.int64)
+        self.deadline = np.ascontiguousarray(deadline, dtype=np.int64)
+        self.length = np.ascontiguousarray(length, dtype=np.int64)
+        self.height = np.ascontiguousarray(height, dtype=np.float64)
+
+        if job_id is None:
+            job_id = np.arange(len(self.release), dtype=np.int64)
+        self.job_id = np.ascontiguousarray(job_id, dtype=np.int64)
+
+        # Every column has to describe the same number of jobs
+        if not (len(self.release) == len(self.deadline) == len(self.length) == len(self.height) == len(self.job_id)):
+            raise ValueError("All job columns must have the same length")
+
+
+    """
+    * from_dicts -> This function builds a job store from a list of job objects with the form {release, deadline, length, height}
+    """
+    @classmethod
+    def from_dicts(cls, jobs):
+        release = np.fromiter((job['release'] for job in jobs), dtype=np.int64, count=len(jobs))
+        deadline = np.fromiter((job['deadline'] for job in jobs), dtype=np.int64, count=len(jobs))
+        length = np.fromiter((job['length'] for job in jobs), dtype=np.int64, count=len(jobs))
+        height = np.fromiter((job['height'] for job in jobs), dtype=np.float64, count=len(jobs))
+
+        return cls(release, deadline, length, height)
+
+
+    def __len__(self):
+        return len(self.release)
+
+
+    """
+    * take -> This function returns a new job store holding only the jobs at the given indices (in the order of the indices)
+    """
+    def take(self, indices):
+        return JobStore(
+            self.release[indices],
+            self.deadline[indices],
+            self.length[indices],
+            self.height[indices],
+            self.job_id[indices]
+        )
+
+
+    """
+    * renumbered -> This function returns the same jobs with their ids replaced by 0, 1, 2, ... in their current order
+    """
+    def renumbered(self):
+        return JobStore(self.release, self.deadline, self.length, self.height)
+
+
+    """
+    * flexibility -> This function returns the flexibility measure of each job that the greedy algorithms sort by
+    """
+    def flexibility(self):
+        return self.release - self.deadline - self.length
+
+
+    """
+    * sort_by_flexibility -> This function returns the jobs sorted in ascending order of their flexibility. Jobs with the same
+    *   flexibility keep their current order
+    """
+    def sort_by_flexibility(self):
+        order = np.argsort(self.flexibility(), kind='stable')
+
+        return self.take(order)
+
+
+    """
+    * to_dicts -> This function turns the store back into a list of job objects. This is only meant for debugging and small batches
+    """
+    def to_dicts(self):
+        columns = [getattr(self, field).tolist() for field in self.fields]
+
+        return [dict(zip(self.fields, values)) for values in zip(*columns)]
+
+
+
+"""
+----- Generate a batch of jobs -----
+
+* generate_jobs -> This function takes in a random sample of jobs and returns the first batch_size jobs that fall within the
+*   given time window as a job store
+*
+* INPUTS
+*   jobs_array (JobStore or list) -> All of the jobs available to the user, either as a job store or as a list of job objects
+*   start_time (int) -> The time after which all jobs must start
+*   end_time (int) -> The time by which all jobs must end
+*   max_length (int) -> The maximum duration of a given job
+*   batch_size (int) -> The size of the batch
+*
+* ADDITIONAL
+* This function will select the jobs based on the parameters. However, it should not select different jobs than other algorithms becuase they will all
+* be provided with the same jobs_array and parameters.
+* The selected jobs are given the ids 0 through batch_size - 1 in the order that they were selected
+"""
+def generate_jobs(jobs_array, start_time, end_time, max_length, batch_size):
+    if isinstance(jobs_array, JobStore):
+        # Check every job at once and keep the first batch_size jobs that fall within the window
+        eligible = (jobs_array.release >= start_time) & (jobs_array.deadline <= end_time) & (jobs_array.length <= max_length)
+        selected = np.flatnonzero(eligible)[:batch_size]
+    else:
+        # Walk through the job objects until enough of them fall within the window
+        selected = []
+        for curr_index, job in enumerate(jobs_array):
+            if job['release'] >= start_time and job['deadline'] <= end_time and job['length'] <= max_length:
+                selected.append(curr_index)
+
+                if len(selected) == batch_size:
+                    break
+
+    if len(selected) < batch_size:
+        raise ValueError(f"Only {len(selected)} jobs fall within the window, but a batch of {batch_size} was requested")
+
+    if isinstance(jobs_array, JobStore):
+        return jobs_array.take(selected).renumbered()
+
+    return JobStore.from_dicts([jobs_array[i] for i in selected])
@@ -0,0 +1,329 @@
+"""
+----- Sparse LP / ILP Model Builder -----
+
+This program computes the constraint matrices of the scheduling LPs and ILPs as sparse arrays. Each block is added to the model as a
+whole, and the solver backend hands it to its solver in bulk. There are two blocks of constraints:
+    - The job assignment rows. Row j says that the decision variables of job j have to add up to one
+    - The time step rows. Row t adds up the height of every decision variable whose interval covers time step t
+
+Both blocks are stored in compressed sparse row (CSR) form. Row i of a block holds the entries indices[indptr[i] : indptr[i + 1]] with the
+values data[indptr[i] : indptr[i + 1]]. The decision variables are numbered the same way as the intervals in a JobIntervals object, so
+variable k is the kth interval in that numbering.
+"""
+
+import numpy as np
+
+
+"""
+----- Store a block of sparse rows -----
+
+* SparseRows -> This class holds a block of constraint rows in compressed sparse row form
+*
+* INPUTS
+*   indptr (array) -> Row i holds the entries from indptr[i] up to (not including) indptr[i + 1]
+*   indices (array) -> The decision variable (column) of each entry
+*   data (array) -> The coefficient of each entry
+"""
+class SparseRows:
+    def __init__(self, indptr, indices, data):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+
+    """
+    * nnz -> This function returns the number of nonzero entries in the block
+    """
+    def nnz(self):
+        return int(self.indptr[-1])
+
+
+    """
+    * row -> This function returns the columns and coefficients of a single row
+    """
+    def row(self, i):
+        start, end = self.indptr[i], self.indptr[i + 1]
+
+        return self.indices[start:end], self.data[start:end]
+
+
+
+"""
+----- Build the job assignment rows -----
+
+* assignment_rows -> This function returns one row per job that holds a coefficient of one for every decision variable of that job
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*
+* ADDITIONAL
+* The decision variables of a job are numbered one after another, so the rows are just the interval offsets of the jobs
+"""
+def assignment_rows(intervals):
+    num_intervals = intervals.num_intervals()
+
+    indices = np.arange(num_intervals, dtype=np.int64)
+    data = np.ones(num_intervals, dtype=np.float64)
+
+    return SparseRows(intervals.offsets.copy(), indices, data)
+
+
+
+"""
+----- Build the time step rows -----
+
+* time_step_rows -> This function returns one row per time step that holds the height of every decision variable that is running during
+*   that time step
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   height (array) -> The height of each job
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*
+* ADDITIONAL
+* The decision variables of job j that are running at time step t are the ones that start between max(first_start, t - length + 1) and
+* min(last_start, t). Those are always numbered one after another, so each (time step, job) pair adds a contiguous run of columns to
+* the row of that time step. The pairs are generated in a single sweep over the time steps that each job could cover, ordered by time
+* step, and the runs are then expanded into the individual entries all at once
+"""
+def time_step_rows(intervals, height, num_time_steps):
+    height = np.asarray(height, dtype=np.float64)
+    num_jobs = len(intervals)
+
+    # Every time step that job j could possibly be running during
+    span = np.where(intervals.count > 0, intervals.count + intervals.length - 1, 0)
+    span_offsets = np.zeros(num_jobs + 1, dtype=np.int64)
+    np.cumsum(span, out=span_offsets[1:])
+
+    pair_job = np.repeat(np.arange(num_jobs, dtype=np.int64), span)
+    pair_time = intervals.first_start[pair_job] + (np.arange(span_offsets[-1], dtype=np.int64) - span_offsets[pair_job])
+
+    # Sweep over the time steps in order. Within a time step the jobs stay in ascending order
+    order = np.argsort(pair_time, kind='stable')
+    pair_job = pair_job[order]
+    pair_time = pair_time[order]
+
+    # Find the run of decision variables that each (time step, job) pair contributes
+    first_start = intervals.first_start[pair_job]
+    low = np.maximum(first_start, pair_time - intervals.length[pair_job] + 1)
+    high = np.minimum(intervals.last_start[pair_job], pair_time)
+    run = high - low + 1
+    run_start = intervals.offsets[pair_job] + (low - first_start)
+
+    # Expand each run into its individual columns
+    run_offsets = np.zeros(len(run) + 1, dtype=np.int64)
+    np.cumsum(run, out=run_offsets[1:])
+    indices = np.repeat(run_start - run_offsets[:-1], run) + np.arange(run_offsets[-1], dtype=np.int64)
+    data = np.repeat(height[pair_job], run)
+
+    # Count the entries of every time step to get the row pointers
+    indptr = np.zeros(num_time_steps + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pair_time, weights=run, minlength=num_time_steps).astype(np.int64), out=indptr[1:])
+
+    return SparseRows(indptr, indices, data)
+
+
+
+"""
+----- Append a column to a block of rows -----
+
+* append_column -> This function adds the same extra column to the end of every row in a block
+*
+* INPUTS
+*   rows (SparseRows) -> The block of rows
+*   columns (array) -> The column to add to each row
+*   value (float) -> The coefficient of the added column
+*
+* ADDITIONAL
+* This is used to add the objective variable (d in the PDAC models and n_t in the AAC models) to each time step row
+"""
+def append_column(rows, columns, value):
+    # The new entry of each row goes right after the row's existing entries
+    indices = np.insert(rows.indices, rows.indptr[1:], columns)
+    data = np.insert(rows.data, rows.indptr[1:], value)
+    indptr = rows.indptr + np.arange(len(rows) + 1, dtype=np.int64)
+
+    return SparseRows(indptr, indices, data)
+
+
+
+"""
+----- Keep only some rows of a block -----
+
+* take_rows -> This function returns a block that holds only the chosen rows of another block, in the order they are given
+*
+* INPUTS
+*   rows (SparseRows) -> The block of rows
+*   keep (array) -> The indices of the rows to keep
+"""
+def take_rows(rows, keep):
+    keep = np.asarray(keep, dtype=np.int64)
+    count = rows.indptr[keep + 1] - rows.indptr[keep]
+
+    indptr = np.zeros(len(keep) + 1, dtype=np.int64)
+    np.cumsum(count, out=indptr[1:])
+    entries = np.repeat(rows.indptr[keep] - indptr[:-1], count) + np.arange(indptr[-1], dtype=np.int64)
+
+    return SparseRows(indptr, rows.indices[entries], rows.data[entries])
+
+
+
+"""
+----- Find the time steps that need a row -----
+
+* dominant_time_steps -> This function returns the time steps whose time step rows can decide the PDAC, in ascending order. The rows of
+*   every other time step can be left out of the PDAC models without changing their optimal objective
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   resources (list) -> The amount of available resources at each discrete time step
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*
+* ADDITIONAL
+* Every PDAC time step row reads (height of the decision variables running at t) - d <= resources[t]. The row of time step t can never be
+* tighter than the row of time step u if every decision variable running at t is also running at u and resources[t] >= resources[u]. The
+* resource curve is hourly data repeated for every minute, so this is true of most time steps:
+*     - If no interval ends right after t, everything running at t is still running at t + 1. Row t is left out if resources[t] is at
+*       least resources[t + 1]
+*     - If no interval starts after the last kept time step p and up to t, everything running at t was already running at p. Row t is
+*       left out if resources[t] is at least resources[p]
+* A row that is left out is always covered by a row that is kept, so the models keep exactly the same feasible schedules and the same
+* optimal PDAC
+"""
+def dominant_time_steps(intervals, resources, num_time_steps):
+    resources = np.asarray(resources[:num_time_steps], dtype=np.float64)
+    jobs = np.flatnonzero(intervals.count > 0)
+
+    # Mark the time steps that some interval starts at, and the time steps that some interval ends right before, with difference arrays
+    starts = np.bincount(intervals.first_start[jobs], minlength=num_time_steps + 1)[:num_time_steps + 1]
+    starts -= np.bincount(intervals.last_start[jobs] + 1, minlength=num_time_steps + 2)[:num_time_steps + 1]
+    has_start = np.cumsum(starts)[:num_time_steps] > 0
+
+    ends = np.bincount(intervals.first_start[jobs] + intervals.length[jobs], minlength=num_time_steps + 2)[:num_time_steps + 2]
+    ends -= np.bincount(intervals.last_start[jobs] + intervals.length[jobs] + 1, minlength=num_time_steps + 2)[:num_time_steps + 2]
+    has_end = np.cumsum(ends)[:num_time_steps + 1] > 0
+
+    # First pass: leave out t when it is covered by t + 1. The last time step has nothing after it
+    keep = np.ones(num_time_steps, dtype=bool)
+    keep[:-1] = has_end[1:num_time_steps] | (resources[:-1] < resources[1:])
+
+    # Second pass: the time steps between two interval starts form a group in which everything running later was already running earlier.
+    # Within a group, a time step is only kept if its resources are below those of every time step kept before it in the group. The
+    # resources are compared by rank, and each group's ranks are shifted below those of every earlier group, so a single running minimum
+    # restarts at each group and every comparison is exact
+    steps = np.flatnonzero(keep)
+    group = np.cumsum(has_start)[steps]
+    _, rank = np.unique(resources[steps], return_inverse=True)
+    key = rank.astype(np.int64) - group * (len(steps) + 1)
+
+    earlier = np.minimum.accumulate(np.concatenate(([np.iinfo(np.int64).max], key[:-1])))
+
+    return steps[key < earlier]
+
+
+
+"""
+----- Get the height of each job -----
+
+* get_job_heights -> This function returns a list of the height of each respective job. The index of the job height corresponds to the
+*   jobs id
+*
+* INPUTS
+*   jobs (JobStore) -> The jobs for the trial
+"""
+def get_job_heights(jobs):
+    height = jobs.height.tolist()
+
+    return height
+
+
+
+"""
+----- Instantiate the PDAC model -----
+
+* generate_ilp -> This creates the PDAC LP or ILP model and its variables
+*
+* INPUTS
+*   decision_variables (DecisionVariables) -> The layout of all of the decision variables in the model
+*   height (list) -> This list of job heights for each job in the trial
+*   integer (bool) -> Whether the decision variables have to be 0 or 1 (the ILP) or can take any value in [0, 1] (the relaxed LP)
+*   debug_names (bool) -> Whether to give every variable a readable name (x_i_j and d) for debugging
+*
+* ADDITIONAL
+* Decision variable k is variable k and the objective variable d comes right after them. The objective, bounds and types of every variable
+* are handed to the model as arrays in one block
+"""
+def generate_ilp(decision_variables, height, integer=True, debug_names=False):
+    # The backends build their constraint blocks from this module, so the model class is only imported once it is needed
+    from Common.backends import LinearModel
+
+    # Create the model. It does not depend on any solver, and is handed to the chosen backend once it is complete
+    # The objective is always minimized
+    problem = LinearModel()
+
+    names = None
+    if debug_names:
+        names = decision_variables.names() + ['d']
+
+    num_variables = len(decision_variables) + 1
+
+    # Only d is minimized. The decision variables lie in [0, 1] and d is at most the height of every job together
+    obj = np.zeros(num_variables)
+    obj[-1] = 1
+
+    lb = np.zeros(num_variables)
+
+    ub = np.ones(num_variables)
+    ub[-1] = sum(height)
+
+    # d is always continuous
+    types = np.full(num_variables, integer, dtype=bool)
+    types[-1] = False
+
+    problem.add_variables(obj=obj, lb=lb, ub=ub, integer=types, names=names)
+
+    return problem
+
+
+
+"""
+----- Generate the PDAC constraints -----
+
+* generate_constraints -> This function generates and applies the necessary linear constraints to the PDAC LP or ILP
+*
+* INPUTS
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   decision_variables (DecisionVariables) -> The layout of all of the decision variables in the model
+*   height (list) -> This list of job heights for each job in the trial
+*   intervals (JobIntervals) -> The range of intervals that each respective job can run in
+*   problem (LinearModel) -> The model of the problem
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*   compress_time (bool) -> Whether to leave out the time step rows that can never decide the PDAC (see dominant_time_steps)
+*
+* ADDITIONAL
+* This function does not have a return value. It's job is to apply the constraints to the problem
+"""
+def generate_constraints(resources, decision_variables, height, intervals, problem, num_time_steps, compress_time=False):
+    # The first set of constraints makes each job run during exactly one interval: the decision variables of every possible interval of a job
+    # add up to one
+    problem.add_rows(assignment_rows(intervals), 'E', np.ones(len(intervals)))
+
+    # The second set of constraints adds up the height of every decision variable whose interval covers a time step. That sum minus the max
+    # height d has to be at most the resources available at the time step. The objective variable d comes right after the decision variables
+    objective_index = len(decision_variables)
+
+    rows = time_step_rows(intervals, height, num_time_steps)
+    rhs = np.asarray(resources[:num_time_steps], dtype=np.float64)
+
+    # Only keep the rows of the time steps that are not covered by the row of another time step. This gives the same optimal objective
+    if compress_time:
+        time_steps = dominant_time_steps(intervals, resources, num_time_steps)
+        rows = take_rows(rows, time_steps)
+        rhs = rhs[time_steps]
+
+    rows = append_column(rows, objective_index, -1)
+    problem.add_rows(rows, 'L', rhs)
@@ -0,0 +1,210 @@
+"""
+----- Model Size Planner -----
+
+This program predicts how large an LP or ILP model will be before any of it is built, and picks a way of solving the PDAC LP that fits in
+memory. The size of every model follows directly from the job windows:
+    - Job j can start at deadline - release - length + 1 different time steps, and each of those starts is a decision variable
+    - Each decision variable appears in the row of every time step its interval covers, so it adds length nonzeros to the time step rows
+      (plus one to its job's assignment row)
+
+Building a model that is too large used to run for minutes before it ran out of memory. With a plan, an oversized model is either
+rejected straight away with a ModelTooLargeError, or solved in a way that needs less memory:
+    - 'full' -> Build the whole LP
+    - 'column_generation' -> Only build the columns that can improve the LP. It gives the same LP optimum
+    - 'coarse' -> Only allow every start_step-th start of every job. The LP is smaller, but its optimum can be worse
+    - 'greedy' -> Do not build an LP at all and schedule the jobs greedily
+"""
+
+import os
+
+
+# The approximate number of bytes that each nonzero of a model costs: its index and value in the model, the temporary arrays made while
+# building the rows, and the solver's own copy of the model
+BYTES_PER_NONZERO = 64
+
+# The approximate number of bytes that column generation needs for every possible start of every job, to price them
+BYTES_PER_INTERVAL = 64
+
+# The share of the machine's physical memory that a plan is allowed to use when no memory limit is given
+MEMORY_SHARE = 0.5
+
+# The smallest start_step of the coarse mode, which is also its start_step when there is no memory limit to pick it from. A finer grid
+# than this is nearly as large as the full LP, so it is never used. With one minute time steps, every job can start on the quarter hour
+# (or at its last start)
+COARSE_START_STEP = 15
+
+# The modes that can be planned, from the most to the least exact
+PLAN_MODES = ('full', 'column_generation', 'coarse', 'greedy')
+
+
+
+"""
+----- Reject a model that is too large -----
+
+* ModelTooLargeError -> This error is raised before a model is built when its predicted memory use is above the memory limit
+"""
+class ModelTooLargeError(MemoryError):
+    pass
+
+
+
+"""
+----- Predict the size of a model -----
+
+* ModelEstimate -> This class holds the predicted size of a model
+*
+* INPUTS
+*   variables (int) -> The number of variables
+*   constraints (int) -> The number of constraint rows
+*   nonzeros (int) -> The number of nonzero coefficients in the constraint rows
+*   intervals (int) -> The number of possible starts of every job, which are priced by column generation
+*
+* ADDITIONAL
+* memory is the approximate number of bytes needed to build and solve the model
+"""
+class ModelEstimate:
+    def __init__(self, variables, constraints, nonzeros, intervals):
+        self.variables = variables
+        self.constraints = constraints
+        self.nonzeros = nonzeros
+        self.intervals = intervals
+        self.memory = nonzeros * BYTES_PER_NONZERO
+
+
+
+"""
+* estimate_model -> This function predicts the size of a PDAC or AAC model from the job windows alone
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*   objective (str) -> 'pdac' for a single objective variable d, or 'aac' for one objective variable per time step
+*   start_step (int) -> Only count every start_step-th start of every job (and its last start), as the coarse LP does
+"""
+def estimate_model(intervals, num_time_steps, objective='pdac', start_step=1):
+    count = intervals.count
+
+    # The starts of every job that become decision variables. A coarse grid keeps starts 0, step, 2 * step, ... and the last start
+    if start_step > 1:
+        starts = -(-count // start_step) + (((count - 1) % start_step != 0) & (count > 0))
+    else:
+        starts = count
+
+    decision_variables = int(starts.sum())
+    objective_variables = 1 if objective == 'pdac' else num_time_steps
+
+    # Each decision variable has one entry in every time step row it covers and one in its assignment row. Each time step row also holds
+    # its objective variable
+    nonzeros = int((starts * (intervals.length + 1)).sum()) + num_time_steps
+
+    return ModelEstimate(decision_variables + objective_variables, len(intervals) + num_time_steps, nonzeros, intervals.num_intervals())
+
+
+
+"""
+----- Pick a plan -----
+
+* available_memory -> This function returns the memory limit to plan against when none is given: MEMORY_SHARE of the machine's physical
+*   memory, or None if it cannot be found (as on Windows)
+"""
+def available_memory():
+    try:
+        return int(os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') * MEMORY_SHARE)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+
+"""
+* check_model_size -> This function raises a ModelTooLargeError if a model is predicted to need more memory than the limit
+*
+* INPUTS
+*   estimate (ModelEstimate) -> The predicted size of the model
+*   memory_limit (int) -> The largest number of bytes the model can use. By default this is MEMORY_SHARE of the physical memory, and
+*       nothing is checked if that cannot be found
+"""
+def check_model_size(estimate, memory_limit=None):
+    if memory_limit is None:
+        memory_limit = available_memory()
+
+    if memory_limit is not None and estimate.memory > memory_limit:
+        raise ModelTooLargeError(
+            f"The model would have {estimate.variables:,} variables and {estimate.nonzeros:,} nonzeros and needs about "
+            f"{estimate.memory / 2**20:,.1f} MiB, which is more than the limit of {memory_limit / 2**20:,.1f} MiB"
+        )
+
+
+
+"""
+* plan_pdac_lp -> This function picks how to solve the relaxed PDAC LP within a memory limit and returns (mode, start_step)
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*   memory_limit (int) -> The largest number of bytes the LP can use. By default this is MEMORY_SHARE of the physical memory
+*   mode (str) -> 'auto' to pick the most exact mode that fits, or one of PLAN_MODES to only check that it fits
+*
+* ADDITIONAL
+* The modes are tried in the order of PLAN_MODES. Column generation is predicted to need the memory to price every start plus a full LP
+* over a coarse grid of starts, which is about what its restricted LP grows to. The coarse mode uses the smallest start_step whose LP fits,
+* but never less than COARSE_START_STEP. It only builds the starts on its grid and prices the other starts a block of jobs at a time (see
+* solve_coarse_lp), so unlike column generation it needs no memory for every start and its model alone is predicted. start_step is 1 for
+* every mode but 'coarse'. A mode that was asked for by name and does not fit raises a ModelTooLargeError. If there is no memory limit (and
+* the physical memory cannot be found), the mode is kept and 'auto' becomes 'full'
+"""
+def plan_pdac_lp(intervals, num_time_steps, memory_limit=None, mode='auto'):
+    if mode != 'auto' and mode not in PLAN_MODES:
+        raise ValueError(f"Unknown LP mode '{mode}'. The modes are 'auto', {', '.join(repr(m) for m in PLAN_MODES)}")
+
+    if memory_limit is None:
+        memory_limit = available_memory()
+
+    if memory_limit is None or mode == 'greedy':
+        if mode == 'coarse':
+            return ('coarse', COARSE_START_STEP)
+        return (mode if mode != 'auto' else 'full', 1)
+
+    full = estimate_model(intervals, num_time_steps)
+
+    # The full LP
+    if mode in ('auto', 'full'):
+        if full.memory <= memory_limit:
+            return ('full', 1)
+        if mode == 'full':
+            check_model_size(full, memory_limit)
+
+    # Column generation, which prices every start but only builds some of them
+    longest = int(intervals.length.max(initial=1))
+    restricted = estimate_model(intervals, num_time_steps, start_step=longest)
+    if mode in ('auto', 'column_generation'):
+        needed = full.intervals * BYTES_PER_INTERVAL + restricted.memory
+        if needed <= memory_limit:
+            return ('column_generation', 1)
+        if mode == 'column_generation':
+            raise ModelTooLargeError(
+                f"Column generation needs about {needed / 2**20:,.1f} MiB to price {full.intervals:,} starts, which is more than the "
+                f"limit of {memory_limit / 2**20:,.1f} MiB"
+            )
+
+    # A coarser grid of starts. The smallest step from COARSE_START_STEP up that fits is found by doubling and then a binary search
+    if mode in ('auto', 'coarse'):
+        widest = int(intervals.count.max(initial=1))
+        step = COARSE_START_STEP
+        while step < widest and estimate_model(intervals, num_time_steps, start_step=step).memory > memory_limit:
+            step *= 2
+
+        coarse = estimate_model(intervals, num_time_steps, start_step=step)
+        if coarse.memory <= memory_limit:
+            low, high = max(step // 2 + 1, COARSE_START_STEP), step
+            while low < high:
+                middle = (low + high) // 2
+                if estimate_model(intervals, num_time_steps, start_step=middle).memory <= memory_limit:
+                    high = middle
+                else:
+                    low = middle + 1
+            return ('coarse', high)
+
+        if mode == 'coarse':
+            check_model_size(coarse, memory_limit)
+
+    return ('greedy', 1)
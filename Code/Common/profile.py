@@ -0,0 +1,82 @@
+"""
+----- Batched Height Profiles -----
+
+This program computes the height profile of many schedules of the same jobs at once. A schedule gives every job a start and an end time,
+and its height profile is the total height of the jobs running at each time step. Each profile is built from a difference array: a job
+adds its height at its start time and removes it at its end time, and a running sum over the time steps turns that into the profile. The
+difference arrays of every schedule are filled with one bincount and summed with one cumsum, so no Python loop runs over the schedules,
+the jobs or the time steps.
+"""
+
+import numpy as np
+
+
+"""
+----- Build the height profiles -----
+
+* height_profiles -> This function returns the height profile of each schedule as a (schedules x time steps) array
+*
+* INPUTS
+*   starts (array) -> The start time of each job in each schedule, as a (schedules x jobs) array
+*   ends (array) -> The end time (exclusive) of each job in each schedule, as a (schedules x jobs) array
+*   height (array) -> The height of each job
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*
+* ADDITIONAL
+* A single schedule can also be passed as one dimensional arrays, and its profile is returned as a one dimensional array
+"""
+def height_profiles(starts, ends, height, num_time_steps):
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    height = np.asarray(height, dtype=np.float64)
+
+    single = starts.ndim == 1
+    starts = np.atleast_2d(starts)
+    ends = np.atleast_2d(ends)
+    num_schedules = starts.shape[0]
+
+    # Each schedule gets its own row of num_time_steps + 1 slots in one flat difference array
+    row_base = (np.arange(num_schedules, dtype=np.int64) * (num_time_steps + 1))[:, None]
+    weights = np.broadcast_to(height, starts.shape)
+
+    diff = np.bincount((row_base + starts).ravel(), weights=weights.ravel(), minlength=num_schedules * (num_time_steps + 1))
+    diff -= np.bincount((row_base + ends).ravel(), weights=weights.ravel(), minlength=num_schedules * (num_time_steps + 1))
+
+    profiles = np.cumsum(diff.reshape(num_schedules, num_time_steps + 1), axis=1)[:, :num_time_steps]
+
+    return profiles[0] if single else profiles
+
+
+
+"""
+----- Score the height profiles -----
+
+* pdac_objectives -> This function returns the peak demand above the resource curve (PDAC) of each height profile
+*
+* INPUTS
+*   profiles (array) -> The height profiles as a (schedules x time steps) array, or a single profile
+*   resources (list) -> The amount of available resources at each discrete time step
+*
+* ADDITIONAL
+* A schedule that stays under the resource curve the whole time has a PDAC of 0
+"""
+def pdac_objectives(profiles, resources):
+    profiles = np.asarray(profiles, dtype=np.float64)
+    resources = np.asarray(resources[:profiles.shape[-1]], dtype=np.float64)
+
+    return np.maximum((profiles - resources).max(axis=-1), 0)
+
+
+
+"""
+* aac_objectives -> This function returns the total area of job power above the resource curve (AAC) of each height profile
+*
+* INPUTS
+*   profiles (array) -> The height profiles as a (schedules x time steps) array, or a single profile
+*   resources (list) -> The amount of available resources at each discrete time step
+"""
+def aac_objectives(profiles, resources):
+    profiles = np.asarray(profiles, dtype=np.float64)
+    resources = np.asarray(resources[:profiles.shape[-1]], dtype=np.float64)
+
+    return np.maximum(profiles - resources, 0).sum(axis=-1)
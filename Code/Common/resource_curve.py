@@ -0,0 +1,210 @@
+"""
+----- Resource Curve Builder -----
+
+This program builds the minute by minute resource curve from the BPA generation data in resource_data.json. Every notebook used to build
+it by hand, looping over all 165 * 60 minutes of the week for each of the wind, solar and hydro series, adding them up and scaling the
+result. Here the series are parsed once, and a curve is built from them with a few array operations:
+    - The chosen series are picked by name and added together hour by hour
+    - Every hour is repeated for each of its 60 minutes (or the hours are linearly interpolated between)
+    - The curve is sliced to the requested day, offset and length and multiplied by the scale factor
+
+The first load converts the hourly series into a small binary cache file that sits next to the JSON file, in the same way as the job
+dataset, and its header is read by the same function (see job_data). Later loads memory map the cache, and the minute by minute curve of
+each choice of series is kept in memory after it is first built, so getting a resource array only costs a slice and a multiplication.
+
+Cache file layout
+    - 8 byte magic string, followed by a fixed size block holding a JSON header (the series names, the number of hours, the offset of the
+      values and the source file's size and modification time)
+    - The hourly values as one float64 matrix with a row for each series
+"""
+
+import json
+import os
+
+import numpy as np
+
+from Common.job_data import HEADER_SIZE, read_cache_header, source_fingerprint
+
+
+CACHE_MAGIC = b'CURVECAC'
+CACHE_VERSION = 1
+VALUES_ALIGNMENT = 64
+
+MINUTES_PER_HOUR = 60
+MINUTES_PER_DAY = 24 * MINUTES_PER_HOUR
+
+# The number of minutes that the analysis notebooks move their curve by for each day. It has always been 24 rather than MINUTES_PER_DAY,
+# and the saved results were made that way, so the notebooks and the benchmarks all place their windows with it (see window_offset)
+ANALYSIS_DAY_MINUTES = 24
+
+# The series that the analysis notebooks add together
+DEFAULT_SOURCES = ('Wind', 'Solar', 'Hydro')
+
+# The minute by minute curves that were already built, keyed by the cache file, its modification time, the series and the interpolation
+_curves = {}
+
+
+
+"""
+----- Load the hourly series -----
+
+* load_resource_series -> This function returns the names of the series in resource_data.json and their hourly values as a
+*   (series x hours) matrix that is memory mapped from the binary cache
+*
+* INPUTS
+*   path (str) -> The path to the resource_data.json file
+*   cache_path (str) -> The path of the binary cache. By default it is the JSON path with a .curvecache extension
+"""
+def load_resource_series(path, cache_path=None):
+    if cache_path is None:
+        cache_path = os.path.splitext(path)[0] + '.curvecache'
+
+    header = read_cache_header(cache_path, CACHE_MAGIC)
+    if header is None or not cache_matches_source(header, path):
+        build_resource_cache(path, cache_path)
+        header = read_cache_header(cache_path, CACHE_MAGIC)
+
+    values = np.memmap(cache_path, dtype='<f8', mode='r', offset=header['offset'], shape=(len(header['names']), header['hours']))
+
+    return (header['names'], values)
+
+
+
+"""
+----- Build a resource curve -----
+
+* build_resource_curve -> This function returns the minute by minute resource curve made from the chosen series of resource_data.json
+*
+* INPUTS
+*   path (str) -> The path to the resource_data.json file
+*   sources (list) -> The names of the series that are added together
+*   day (int) -> The number of whole days into the week that the curve starts at
+*   offset (int) -> The number of minutes after the start of the day that the curve starts at
+*   length (int) -> The number of minutes in the curve. By default the curve runs to the end of the data
+*   scale (float) -> The factor that every resource value is multiplied by
+*   interpolate (bool) -> Whether to linearly interpolate between the hourly values instead of repeating each one for its 60 minutes
+*   cache_path (str) -> The path of the binary cache. By default it is the JSON path with a .curvecache extension
+*
+* ADDITIONAL
+* The returned array is a new float64 array that can be changed freely. Each hourly value is the generation of the hour ending at its
+* timestamp, so with interpolation every value is placed at the middle of its hour, and the minutes before the first middle and after the
+* last one keep the first and last value
+"""
+def build_resource_curve(path, sources=DEFAULT_SOURCES, day=0, offset=0, length=None, scale=1.0, interpolate=False, cache_path=None):
+    curve = minute_curve(path, tuple(sources), interpolate, cache_path)
+
+    start = day * MINUTES_PER_DAY + offset
+    end = max(start, len(curve)) if length is None else start + length
+    if start < 0 or end > len(curve) or end < start:
+        raise ValueError(f"The curve from minute {start} to minute {end} is outside of the {len(curve)} minutes of resource data")
+
+    return curve[start:end] * scale
+
+
+
+"""
+* window_offset -> This function returns the minute of the week that the resource curve of an analysis window starts at
+*
+* INPUTS
+*   day (int) -> The day of the analysis
+*   start_time (int) -> The earliest possible starting time for each job
+*
+* ADDITIONAL
+* Pass it as the offset of build_resource_curve (with the default day of 0), or slice a whole week long curve from it
+"""
+def window_offset(day, start_time):
+    return ANALYSIS_DAY_MINUTES * day + start_time
+
+
+
+"""
+* minute_curve -> This function returns the read-only minute by minute curve of the whole week for the chosen series, building it the
+*   first time it is asked for
+*
+* INPUTS
+*   path (str) -> The path to the resource_data.json file
+*   sources (tuple) -> The names of the series that are added together
+*   interpolate (bool) -> Whether to linearly interpolate between the hourly values
+*   cache_path (str) -> The path of the binary cache
+"""
+def minute_curve(path, sources, interpolate, cache_path=None):
+    key = (os.path.abspath(path), cache_path, os.stat(path).st_mtime_ns, sources, interpolate)
+    if key in _curves:
+        return _curves[key]
+
+    names, values = load_resource_series(path, cache_path)
+
+    unknown = [source for source in sources if source not in names]
+    if unknown:
+        raise ValueError(f"Unknown resource series {', '.join(unknown)}. The series are {', '.join(names)}")
+
+    hourly = values[[names.index(source) for source in sources]].sum(axis=0)
+
+    if interpolate:
+        minutes = np.arange(len(hourly) * MINUTES_PER_HOUR, dtype=np.float64)
+        middles = np.arange(len(hourly), dtype=np.float64) * MINUTES_PER_HOUR + (MINUTES_PER_HOUR - 1) / 2
+        curve = np.interp(minutes, middles, hourly)
+    else:
+        curve = np.repeat(hourly, MINUTES_PER_HOUR)
+
+    curve.flags.writeable = False
+    _curves[key] = curve
+
+    return curve
+
+
+
+"""
+----- Build the binary cache -----
+
+* build_resource_cache -> This function parses resource_data.json once and writes the hourly values of every series to the binary cache
+*
+* INPUTS
+*   path (str) -> The path to the resource_data.json file
+*   cache_path (str) -> The path that the cache file is written to
+*
+* ADDITIONAL
+* The cache is written to a temporary file first and then moved into place, so a worker that loads the curve at the same time never
+* sees a half written cache
+"""
+def build_resource_cache(path, cache_path):
+    with open(path, 'r') as file:
+        data = json.load(file)
+
+    names = [series['name'] for series in data['series']]
+    values = np.array([[point['value'] for point in series['data']] for series in data['series']], dtype='<f8')
+
+    values_offset = -(-(len(CACHE_MAGIC) + HEADER_SIZE) // VALUES_ALIGNMENT) * VALUES_ALIGNMENT
+    header = {'version': CACHE_VERSION, 'names': names, 'hours': values.shape[1], 'offset': values_offset}
+    header.update(source_fingerprint(path))
+
+    block = json.dumps(header).encode('ascii')
+    if len(block) > HEADER_SIZE:
+        raise ValueError("The resource cache header does not fit in its reserved block")
+
+    temp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(CACHE_MAGIC)
+        file.write(block.ljust(HEADER_SIZE, b' '))
+
+        file.seek(values_offset)
+        file.write(np.ascontiguousarray(values).tobytes())
+
+    os.replace(temp_path, cache_path)
+
+
+
+"""
+----- Check whether the cache is still valid -----
+
+* cache_matches_source -> This function checks whether the cache was built from the current version of the JSON file. The file is small,
+*   so the cache is simply rebuilt whenever its size or modification time changes
+"""
+def cache_matches_source(header, path):
+    if header.get('version') != CACHE_VERSION:
+        return False
+
+    fingerprint = source_fingerprint(path)
+
+    return fingerprint['source_size'] == header['source_size'] and fingerprint['source_mtime_ns'] == header['source_mtime_ns']
+
@@ -0,0 +1,29 @@
+"""
+----- Schedule Results -----
+
+This program holds the result that the LP and ILP solve_* functions of the PDAC folder return. It used to be a tuple whose length and
+meaning changed with the options of the call (the number of roundings, whether the LP solution or the job starts were asked for, and
+whether the LP fell back to the greedy schedule), so callers had to know those options to find a value by its position. The result always
+has the same fields, and the ones that a call does not fill in are None.
+
+The result is still a tuple, so result[0] is always the objective value and result[1] the heights, as before.
+"""
+
+from collections import namedtuple
+
+
+"""
+----- Hold the result of a solve_* call -----
+
+* ScheduleResult -> This tuple holds the schedule that a solve_* function found, along with what it learned on the way
+*
+* FIELDS
+*   objective (float) -> The PDAC of the schedule
+*   heights (list) -> The total height of the scheduled jobs at each time step
+*   summary (dict) -> The summary of the roundings when more than one was drawn (see choose_best_schedule), or None
+*   solution (Solution) -> The solution of the LP or ILP the schedule came from, or None if no model was solved. Its bound is a lower bound
+*       on the PDAC of every schedule of the batch (see bounds)
+*   starts (list) -> The time step (counted from start_time) that each job of the batch starts at, in the order of the batch, or None if
+*       the solver does not track them
+"""
+ScheduleResult = namedtuple('ScheduleResult', ['objective', 'heights', 'summary', 'solution', 'starts'], defaults=(None, None, None))
@@ -0,0 +1,50 @@
+"""
+----- Randomized Rounding of the Relaxed LP -----
+
+This program turns the fractional solution of a relaxed LP into a schedule. The decision variables of each job add up to one, so they are
+treated as the probabilities of that job running within each of its intervals, and one interval is drawn for every job. All of the jobs
+are drawn at once: a single cumulative sum runs over every decision variable, and each job's random number is looked up in it with a
+binary search that only lands within that job's own variables.
+"""
+
+import numpy as np
+
+
+"""
+----- Round the LP solution -----
+
+* round_relaxed_solution -> This function draws one decision variable for every job based on the values of the relaxed LP solution, and
+*   returns the index of the chosen decision variable of each job
+*
+* INPUTS
+*   values (array) -> The value of every decision variable in the solved LP. Any variables after the decision variables are ignored
+*   decision_variables (DecisionVariables) -> The layout of the decision variables in the LP
+*   rng (numpy Generator) -> The random number generator used to draw the intervals. A fresh unseeded one is used if it is not given
+*   samples (int) -> The number of independent roundings to draw. If it is given, the chosen indices come back as a (samples x jobs) array
+*
+* ADDITIONAL
+* The values of a job are scaled by their sum, so a job whose values add up to slightly less than one because of the solver's tolerances is
+* still always scheduled. Values that the solver reports as slightly negative are treated as zero
+"""
+def round_relaxed_solution(values, decision_variables, rng=None, samples=None):
+    if rng is None:
+        rng = np.random.default_rng()
+
+    offsets = decision_variables.offsets
+    num_jobs = decision_variables.num_jobs()
+
+    # Running total of the values over every decision variable, job after job
+    values = np.maximum(np.asarray(values, dtype=np.float64)[:len(decision_variables)], 0)
+    cumulative = np.cumsum(values)
+
+    # Where each job's running total starts and how much it adds up to
+    totals = np.concatenate(([0.0], cumulative))
+    job_base = totals[offsets[:-1]]
+    job_total = totals[offsets[1:]] - job_base
+
+    # Draw a number in (0, 1] for each job (in each sample) and find the first of its decision variables whose running total reaches it
+    draws = 1.0 - rng.random(num_jobs if samples is None else (samples, num_jobs))
+    chosen = np.searchsorted(cumulative, job_base + draws * job_total, side='left')
+
+    # Keep every lookup within its own job's decision variables in case of floating point ties at the job boundaries
+    return np.clip(chosen, offsets[:-1], offsets[1:] - 1)
@@ -0,0 +1,142 @@
+"""
+----- Shared Job and Resource Arrays -----
+
+This program places the job columns and the resource curve in a single block of shared memory, so that the worker processes of a parallel
+run can all read the same copy of them. The process that runs the analysis creates the block once, and each worker attaches to it by name
+and builds its job store and resource curve as views straight into the block. Nothing is pickled or copied into the workers except the
+small description of where each array sits in the block, so the memory and startup time of a worker stay the same no matter how many
+workers there are.
+
+The block uses the same column layout as the binary job cache: every column starts at an aligned offset, one after another, followed by
+the resource curve.
+"""
+
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from Common.job_store import JobStore
+from Common.job_data import COLUMN_DTYPES, COLUMN_ALIGNMENT
+
+
+RESOURCES_DTYPE = '<f8'
+
+
+
+"""
+----- Hold the shared block -----
+
+* SharedJobData -> This class holds a block of shared memory with every job column and the resource curve, along with read-only views of
+*   them
+*
+* INPUTS
+*   block (SharedMemory) -> The block of shared memory
+*   layout (dict) -> Where each array sits in the block (see create)
+*   owner (bool) -> Whether this process created the block, and so has to free it once the run is over
+*
+* ADDITIONAL
+* Use create in the process that runs the analysis and attach in each worker. The creator should be used as a with block, which frees the
+* shared memory when it ends. Only the creator ever unlinks the block: a worker's close only drops its own views, and an attached block is
+* never registered with the resource tracker, which would otherwise unlink it (or warn about a leak) when the worker exits. The views are
+* only valid while the SharedJobData object that made them is alive
+"""
+class SharedJobData:
+    def __init__(self, block, layout, owner=False):
+        self.block = block
+        self.layout = layout
+        self.owner = owner
+
+        views = {}
+        for field, (dtype, offset, count) in layout['arrays'].items():
+            views[field] = np.ndarray((count,), dtype=dtype, buffer=block.buf, offset=offset)
+            views[field].flags.writeable = False
+
+        self.jobs = JobStore(views['release'], views['deadline'], views['length'], views['height'], views['job_id'])
+        self.resources = views['resources']
+
+
+    """
+    * create -> This function copies the jobs and the resource curve into a new block of shared memory
+    *
+    * INPUTS
+    *   jobs (JobStore or list) -> All of the jobs
+    *   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+    """
+    @classmethod
+    def create(cls, jobs, resources):
+        if not isinstance(jobs, JobStore):
+            jobs = JobStore.from_dicts(jobs)
+        resources = np.asarray(resources, dtype=RESOURCES_DTYPE)
+
+        arrays = {field: np.ascontiguousarray(getattr(jobs, field), dtype=dtype) for field, dtype in COLUMN_DTYPES.items()}
+        arrays['resources'] = resources
+
+        # Lay the arrays out one after another, each starting on an aligned offset
+        offset = 0
+        layout = {}
+        for field, values in arrays.items():
+            offset = -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+            layout[field] = (values.dtype.str, offset, len(values))
+            offset += values.nbytes
+
+        block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for field, values in arrays.items():
+            _, offset, count = layout[field]
+            np.ndarray((count,), dtype=values.dtype, buffer=block.buf, offset=offset)[:] = values
+
+        return cls(block, {'name': block.name, 'arrays': layout}, owner=True)
+
+
+    """
+    * attach -> This function attaches to a block that another process created, given its description
+    *
+    * INPUTS
+    *   description (dict) -> The description of the block, from the description function of the process that created it
+    *
+    * ADDITIONAL
+    * Python 3.13 and later can open the block with track=False. Before that, SharedMemory always registers the block with the resource
+    * tracker, so the registration is skipped while the block is opened. Unregistering it afterwards is not enough, since workers started by
+    * multiprocessing share the creator's tracker and that would also drop the creator's registration
+    """
+    @classmethod
+    def attach(cls, description):
+        if sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name=description['name'], track=False), description)
+
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            block = shared_memory.SharedMemory(name=description['name'])
+        finally:
+            resource_tracker.register = register
+
+        return cls(block, description)
+
+
+    """
+    * description -> This function returns the name of the block and where each array sits in it. This is all that a worker needs to
+    *   attach to the block, and it is small enough to send to every worker
+    """
+    def description(self):
+        return self.layout
+
+
+    """
+    * close -> This function drops this process's views of the block, and frees (unlinks) the block only if this process created it
+    """
+    def close(self):
+        self.jobs = None
+        self.resources = None
+        self.block.close()
+
+        if self.owner:
+            self.block.unlink()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,229 @@
+"""
+----- On-Disk Solution Cache -----
+
+This program stores the solutions of LP and ILP models on disk so that an identical model is never solved twice. Notebooks and sweeps are
+rerun with the same seeds over and over, and each rerun used to solve exactly the same models again. With a cache, a repeated solve_*
+call reads the solution back and goes straight to rounding and evaluating it.
+
+Every solution is filed under a key: the SHA-256 hash of everything that decides the model and its solution, which is the solver, the
+backend, the options that change the model (such as compress_time), the height and possible starts of every job in the batch, and the
+slice of the resource curve it is scheduled against. Two calls share a key only if they would build the same model, so a cached solution
+is never used for a different batch.
+
+Cache layout
+    - One .npz file per solution, named after its key, holding the nonzero primal values (as positions and values), the number of
+      primal values, the objective and the bound. LP and ILP solutions are mostly zeros, so only the nonzeros are stored
+    - Reading a solution updates its modification time, and when the files grow past the size limit, the least recently used ones are
+      deleted first
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from Common.backends import Solution
+from Common.stats import counted
+
+
+# The version of the key and file layout. Changing it makes every existing entry unreachable, so stale entries are never read back
+CACHE_VERSION = 1
+
+# The default size limit of a cache directory, in bytes
+DEFAULT_MAX_BYTES = 2**30
+
+
+
+"""
+----- Hold the cache -----
+
+* SolutionCache -> This class stores and looks up solutions in a directory
+*
+* INPUTS
+*   directory (str) -> The directory that holds the cache files. It is created if it does not exist
+*   max_bytes (int) -> The largest total size of the cache files. Once it is passed, the least recently used files are deleted
+*
+* ADDITIONAL
+* Files are written to a temporary file first and then moved into place, so several processes can share one cache directory and never
+* read a half written solution
+"""
+class SolutionCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        os.makedirs(directory, exist_ok=True)
+
+
+    """
+    * path -> This function returns the path of the file that holds the solution with the given key
+    """
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.npz')
+
+
+    """
+    * load -> This function returns the solution with the given key along with the extra arrays that were stored with it, or
+    *   (None, None) if there is no such solution
+    *
+    * INPUTS
+    *   key (str) -> The key of the solution (see solution_key)
+    """
+    def load(self, key):
+        path = self.path(key)
+
+        try:
+            with np.load(path) as data:
+                primal = np.zeros(int(data['num_primal']), dtype=np.float64)
+                primal[data['positions']] = data['values']
+                solution = Solution(primal, float(data['objective']), float(data['bound']))
+
+                extras = {name[len('extra_'):]: data[name] for name in data.files if name.startswith('extra_')}
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return (None, None)
+
+        # Mark the file as just used, so that it is evicted last
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return (solution, extras)
+
+
+    """
+    * store -> This function stores a solution under the given key and evicts the least recently used solutions if the cache is too large
+    *
+    * INPUTS
+    *   key (str) -> The key of the solution (see solution_key)
+    *   solution (Solution) -> The solution to store. Only its primal values, objective and bound are kept
+    *   extras (dict) -> Optional arrays to store with the solution, such as the layout of the columns of a column generation solution
+    """
+    def store(self, key, solution, extras=None):
+        primal = np.asarray(solution.primal, dtype=np.float64)
+        positions = np.flatnonzero(primal)
+
+        arrays = {
+            'num_primal': np.int64(len(primal)),
+            'positions': positions.astype(np.int32 if len(primal) < 2**31 else np.int64),
+            'values': primal[positions],
+            'objective': np.float64(solution.objective),
+            'bound': np.float64(solution.bound if solution.bound is not None else np.nan),
+        }
+        for name, array in (extras or {}).items():
+            arrays[f'extra_{name}'] = np.asarray(array)
+
+        # np.savez adds .npz to any path without it, so the temporary file keeps the extension
+        temp_path = os.path.join(self.directory, f'{key}.{os.getpid()}.tmp.npz')
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, self.path(key))
+
+        self.evict()
+
+
+    """
+    * evict -> This function deletes the least recently used solutions until the cache is within its size limit
+    """
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz') and '.tmp' not in entry.name:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+    """
+    * clear -> This function deletes every solution in the cache
+    """
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                os.remove(entry.path)
+
+
+
+"""
+----- Find the key of a model -----
+
+* solution_key -> This function returns the key that the solution of a model is filed under
+*
+* INPUTS
+*   solver (str) -> The name of the solver, such as 'pdac_lp'
+*   backend (str) -> The solver backend
+*   options (dict) -> The options that change the model or how it is solved, such as compress_time. They have to be JSON serializable
+*   height (list) -> The height of each job
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*
+* ADDITIONAL
+* The options are hashed as sorted JSON and the arrays as little endian bytes, so the key is the same on every machine
+"""
+def solution_key(solver, backend, options, height, intervals, resources, num_time_steps):
+    digest = hashlib.sha256()
+
+    header = {'version': CACHE_VERSION, 'solver': solver, 'backend': backend, 'options': options, 'num_time_steps': num_time_steps,
+              'num_jobs': len(intervals)}
+    digest.update(json.dumps(header, sort_keys=True).encode('utf-8'))
+
+    arrays = (
+        np.asarray(height, dtype='<f8'),
+        intervals.first_start.astype('<i8'),
+        intervals.last_start.astype('<i8'),
+        intervals.length.astype('<i8'),
+        np.asarray(resources[:num_time_steps], dtype='<f8'),
+    )
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+
+    return digest.hexdigest()
+
+
+
+"""
+----- Look up a solve_* call -----
+
+* lookup_solution -> This function looks up the solution of a model in a cache and returns (key, solution, extras). The key is None if
+*   there is no cache, and the solution and extras are None if the model has not been solved before
+*
+* INPUTS
+*   cache (SolutionCache) -> The cache, or None
+*   stats (SolveStats) -> An optional statistics object that counts the cache hits and misses
+*   The other inputs are the same as for solution_key
+"""
+def lookup_solution(cache, stats, solver, backend, options, height, intervals, resources, num_time_steps):
+    if cache is None:
+        return (None, None, None)
+
+    key = solution_key(solver, backend, options, height, intervals, resources, num_time_steps)
+    solution, extras = cache.load(key)
+    counted(stats, 'cache_hits' if solution is not None else 'cache_misses')
+
+    return (key, solution, extras)
+
+
+
+"""
+* get_cache -> This function returns the cache that a solve_* function was given, which can be a SolutionCache, the path of a cache
+*   directory or None for no cache
+"""
+def get_cache(cache):
+    if cache is None or isinstance(cache, SolutionCache):
+        return cache
+
+    return SolutionCache(cache)
@@ -0,0 +1,131 @@
+"""
+----- Solve Statistics -----
+
+This program holds the statistics object that the solve_* functions can fill in while they run. Passing a SolveStats object to a solver
+records how long each phase of the solver took, so that (for example) building the LP model can be told apart from solving it. It also
+records counters such as the size of the model, the number of iterations or branch and bound nodes the solver reported and the number of
+roundings that were drawn. When no statistics object is passed in, nothing is recorded and the timing code costs nothing.
+
+The phases that the solve_* functions record are:
+    - 'jobs' -> Picking the batch of jobs (generate_jobs)
+    - 'intervals' -> Finding the intervals of every job (get_job_intervals)
+    - 'variables' -> Laying out the decision variables and creating the model's variables
+    - 'constraints' -> Building the constraint rows
+    - 'build' -> Building or growing the model, in the column generation and incremental LPs
+    - 'solve' -> Solving the model
+    - 'price' -> Pricing the missing columns, in the column generation LP
+    - 'schedule' -> Building the schedule of the naive and greedy algorithms
+    - 'round' -> Turning the LP solution into a schedule
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+
+
+"""
+----- Record solver statistics -----
+
+* SolveStats -> This class collects the time spent in each phase of a solver along with counters of what the solver did
+*
+* INPUTS
+*   callback (function) -> An optional function that is called as callback(kind, name, value) every time something is recorded. kind is
+*       'phase' (with the phase's duration in seconds) or 'count' (with the counter's new value)
+*
+* ADDITIONAL
+* timings maps the name of each phase to the number of seconds spent in it. A phase that runs more than once adds up its durations.
+* counts maps the name of each counter to its value. The counters are:
+*     - 'variables', 'constraints' and 'nonzeros' -> The size of the model that was solved
+*     - 'iterations' and 'nodes' -> The simplex (or barrier) iterations and the branch and bound nodes that the solver reported. Not every
+*       backend reports both
+*     - 'solves' -> The number of times a model was solved
+*     - 'columns' and 'pricing_rounds' -> The columns created and the rounds of pricing, in the column generation LP
+*     - 'samples' -> The number of roundings drawn from the LP solution
+"""
+class SolveStats:
+    def __init__(self, callback=None):
+        self.timings = {}
+        self.counts = {}
+        self.callback = callback
+
+
+    """
+    * phase -> This function times the code inside of a with block and records it under the given phase name
+    """
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+            if self.callback is not None:
+                self.callback('phase', name, elapsed)
+
+
+    """
+    * count -> This function adds to a counter. Counters that are recorded more than once (such as the iterations of every solve of the
+    *   column generation LP) add up
+    """
+    def count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+        if self.callback is not None:
+            self.callback('count', name, self.counts[name])
+
+
+
+"""
+* timed -> This function returns the timing context of a phase, or a context that does nothing if no statistics object was given
+"""
+def timed(stats, name):
+    if stats is None:
+        return nullcontext()
+
+    return stats.phase(name)
+
+
+
+"""
+* counted -> This function adds to a counter of a statistics object, and does nothing if no statistics object was given
+"""
+def counted(stats, name, value=1):
+    if stats is not None:
+        stats.count(name, value)
+
+
+
+"""
+* record_model -> This function records the size of a model that is about to be solved
+*
+* INPUTS
+*   stats (SolveStats) -> The statistics object, or None
+*   model (LinearModel) -> The model
+"""
+def record_model(stats, model):
+    if stats is None:
+        return
+
+    stats.count('variables', model.num_variables())
+    stats.count('constraints', model.num_rows())
+    stats.count('nonzeros', model.nnz())
+
+
+
+"""
+* record_solution -> This function records what the solver reported about a solve
+*
+* INPUTS
+*   stats (SolveStats) -> The statistics object, or None
+*   solution (Solution) -> The solution that the backend returned
+"""
+def record_solution(stats, solution):
+    if stats is None:
+        return
+
+    stats.count('solves')
+    if solution.iterations is not None:
+        stats.count('iterations', solution.iterations)
+    if solution.nodes is not None:
+        stats.count('nodes', solution.nodes)
@@ -0,0 +1,120 @@
+"""
+----- Integer Indexed Decision Variables -----
+
+This program holds the layout of the decision variables in the LP and ILP models. Decision variable k says that job job[k] runs within the
+interval (start[k], end[k]). The variables are referred to by their index k everywhere, both when the model is built and when the solution
+is read back, so no variable names have to be created or parsed. Names of the form x_i_j (the ith interval of job j) can still be generated
+for debugging.
+"""
+
+import numpy as np
+
+
+"""
+----- Store the decision variable layout -----
+
+* DecisionVariables -> This class maps each decision variable index to its job and interval
+*
+* INPUTS
+*   job (array) -> The job that each decision variable belongs to. The variables of a job have to come one after another
+*   start (array) -> The start time of each decision variable's interval
+*   end (array) -> The end time of each decision variable's interval
+*   num_jobs (int) -> The number of jobs in the batch
+*
+* ADDITIONAL
+* The decision variables of job j are numbers offsets[j] to offsets[j + 1] - 1
+"""
+class DecisionVariables:
+    def __init__(self, job, start, end, num_jobs):
+        self.job = np.ascontiguousarray(job, dtype=np.int64)
+        self.start = np.ascontiguousarray(start, dtype=np.int64)
+        self.end = np.ascontiguousarray(end, dtype=np.int64)
+
+        self.offsets = np.zeros(num_jobs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.job, minlength=num_jobs), out=self.offsets[1:])
+
+
+    """
+    * from_intervals -> This function lays out one decision variable for every interval of every job, in the same order as the intervals
+    """
+    @classmethod
+    def from_intervals(cls, intervals):
+        job = intervals.interval_jobs()
+        start = intervals.interval_starts()
+
+        return cls(job, start, start + intervals.length[job], len(intervals))
+
+
+    def __len__(self):
+        return len(self.job)
+
+
+    """
+    * num_jobs -> This function returns the number of jobs that the decision variables belong to
+    """
+    def num_jobs(self):
+        return len(self.offsets) - 1
+
+
+    """
+    * names -> This function returns the debugging name x_i_j of every decision variable, where i is the variable's position among the
+    *   variables of job j
+    """
+    def names(self):
+        position = np.arange(len(self), dtype=np.int64) - self.offsets[self.job]
+
+        return [f'x_{i}_{j}' for i, j in zip(position.tolist(), self.job.tolist())]
+
+
+
+"""
+----- Generate the decision variables -----
+
+* generate_decision_variables -> This function lays out the decision variables of the LP and ILP models
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*
+* ADDITIONAL
+* There is one decision variable for every interval of every job, numbered the same way as the intervals
+"""
+def generate_decision_variables(intervals):
+    return DecisionVariables.from_intervals(intervals)
+
+
+
+"""
+----- Decode an integer solution -----
+
+* decode_integer_solution -> This function returns the index of the decision variable that each job was scheduled with in a solved ILP
+*
+* INPUTS
+*   values (array) -> The value of every decision variable in the solved ILP. Any variables after the decision variables are ignored
+*   decision_variables (DecisionVariables) -> The layout of the decision variables in the ILP
+*   tolerance (float) -> How far from 1 a value can be and still count as 1
+*
+* ADDITIONAL
+* The solver only holds integer variables to within its integrality tolerance, so a chosen variable can come back as 0.9999999 rather than
+* exactly 1. Each job takes its largest decision variable (the earliest one on a tie), and a ValueError is raised if that value is not 1
+* within the tolerance. A job without any decision variables cannot be scheduled at all, so it also raises a ValueError
+"""
+def decode_integer_solution(values, decision_variables, tolerance=1e-6):
+    values = np.asarray(values, dtype=np.float64)[:len(decision_variables)]
+    offsets = decision_variables.offsets
+
+    # reduceat would return the next job's first value for a job without decision variables, so those jobs are rejected first
+    empty = np.flatnonzero(offsets[1:] == offsets[:-1])
+    if len(empty) > 0:
+        raise ValueError(f"Jobs {empty.tolist()} have no interval that they can run within, so they cannot be scheduled")
+
+    # The largest value within each job's decision variables
+    best = np.maximum.reduceat(values, offsets[:-1])
+
+    # The first decision variable of each job that holds that value
+    position = np.where(values == best[decision_variables.job], np.arange(len(values), dtype=np.int64), len(values))
+    chosen = np.minimum.reduceat(position, offsets[:-1])
+
+    if np.any(best < 1 - tolerance):
+        raise ValueError("The solution does not schedule every job at exactly one interval")
+
+    return chosen
@@ -0,0 +1,59 @@
+"""
+----- Sliding Window Queries -----
+
+This program answers the question that the greedy algorithms ask for every job: for each start time the job could have, what is the
+largest (or total) value over the time steps that the job would run during? Both are computed for every start time of a job at once, in
+time proportional to the number of start times plus the job's length, no matter how long the job is.
+"""
+
+import numpy as np
+
+
+"""
+----- Maximum over every window -----
+
+* sliding_window_max -> This function returns the maximum of values[s : s + length] for every start s from 0 to len(values) - length
+*
+* INPUTS
+*   values (array) -> The values to take the window maxima of
+*   length (int) -> The number of values in each window
+*
+* ADDITIONAL
+* This is the van Herk / Gil-Werman algorithm. The values are split into blocks of the window's length, and a running maximum is taken
+* forwards and backwards within each block. Every window spans the end of one block and the start of the next, so its maximum is the larger
+* of the backward running maximum where it starts and the forward running maximum where it ends
+"""
+def sliding_window_max(values, length):
+    values = np.asarray(values, dtype=np.float64)
+    num_windows = len(values) - length + 1
+
+    if length == 1:
+        return values.copy()
+
+    # Pad the values out to a whole number of blocks. The padding is never the maximum of a window
+    padding = (-len(values)) % length
+    blocks = np.concatenate((values, np.full(padding, -np.inf))).reshape(-1, length)
+
+    forward = np.maximum.accumulate(blocks, axis=1).ravel()
+    backward = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    return np.maximum(backward[:num_windows], forward[length - 1:length - 1 + num_windows])
+
+
+
+"""
+----- Sum over every window -----
+
+* sliding_window_sum -> This function returns the sum of values[s : s + length] for every start s from 0 to len(values) - length
+*
+* INPUTS
+*   values (array) -> The values to take the window sums of
+*   length (int) -> The number of values in each window
+*
+* ADDITIONAL
+* Each window sum is the difference of two prefix sums, so every window costs the same no matter how long it is
+"""
+def sliding_window_sum(values, length):
+    prefix = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+    return prefix[length:] - prefix[:-length]
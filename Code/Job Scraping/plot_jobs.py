@@ -1,6 +1,13 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Add the Code/ folder to sys.path so that the shared height profile code can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Common.profile import height_profiles
+
 """
 * create_graph -> Create a bar graph showing the power usage of all input jobs over a period of one day
 * 
@@ -11,15 +18,12 @@ import numpy as np
 * None
 """
 def create_graph(jobs, extension, extension_num):
-    time_array = [0 for _ in range(1440)]
-    for job_object in jobs:
-        aj = job_object['release']
-        dj = job_object['deadline']
-        lj = job_object['length']
-        hj = job_object['height']
-
-        for i in range(aj, aj + lj + 1):
-            time_array[i] += hj
+    # Each job is drawn from its release time through its release time plus its length (inclusive)
+    release = np.array([job_object['release'] for job_object in jobs], dtype=np.int64)
+    length = np.array([job_object['length'] for job_object in jobs], dtype=np.int64)
+    height = np.array([job_object['height'] for job_object in jobs], dtype=np.float64)
+
+    time_array = height_profiles(release, release + length + 1, height, 1440)
 
     graph_xvalues = np.array([i for i in range(1440)])
     graph_yvalues = np.array(time_array)
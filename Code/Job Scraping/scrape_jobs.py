@@ -1,9 +1,17 @@
+import os
+import sys
 import json
 import random
 import csv
 
+import numpy as np
+
 from plot_jobs import create_graph
 
+# Add the Code/ folder to sys.path so that the shared job loader can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Common.job_data import load_jobs
+
 """
 *********
     An important thing to note is that each instance is its own isolated test case
@@ -93,28 +101,19 @@ def get_jobs(batch_size, start_time, end_time):
 """
 def get_jobs_aggregated(batch_size, start_time, end_time):
 
-    # Open the job_data.json file 
+    # Load the job_data.json file through its binary cache
     path = '../Data/job_data.json'
-    with open(path, 'r') as file:
-        data = json.load(file)
+    jobs = load_jobs(path)
     
     # Randomly shuffle the jobs so that there is variation between trials
-    jobs = data['jobs']
-    random.shuffle(jobs)
-
-    job_array = []
+    # Only the first batch_size jobs of the shuffled order are looked at, and each one keeps its position in that order as its job id
+    order = np.random.permutation(len(jobs))[:batch_size]
+    batch = jobs.take(order).renumbered()
 
     # ** Maybe add a check to see if the batch size will be out of bounds ** 
-    # Iterate through the job objects and create an array of objects that fall within the specified time window
-    for i in range(batch_size):
-        aj = jobs[i]['release']
-        dj = jobs[i]['deadline']
-
-        # Check if the specific job lies within the correct window
-        # The funky syntax is used to put the job id at the very front of the dictionary
-        if aj >= start_time and dj <= end_time:
-            job_id = {'job_id' : i}
-            job_array.append({**job_id, **jobs[i]})
+    # Check which of those jobs fall within the specified time window
+    in_window = (batch.release >= start_time) & (batch.deadline <= end_time)
+    job_array = batch.take(np.flatnonzero(in_window)).to_dicts()
     
     # Return the array of job objects
     return job_array
@@ -0,0 +1,353 @@
+"""
+----- Solve the PDAC LP with Column Generation -----
+
+This program solves the relaxed PDAC LP without creating a decision variable for every possible start of every job. It starts from a
+small restricted LP that only holds a few starts of each job, and then repeatedly prices out the starts that are missing: the dual values
+of the time step rows say how much each time step adds to the PDAC, so the reduced cost of starting job j at time s is
+
+    -(dual of job j's assignment row) - height[j] * (sum of the time step duals from s up to s + length[j])
+
+The window sum is the difference of two prefix sums of the time step duals, so every missing start of every job is priced in one pass.
+The start of each job with the most negative reduced cost is added and the restricted LP is solved again. Once no start has a negative
+reduced cost, the restricted LP's solution is an optimal solution of the full LP. The full LP has a column with one entry per time step
+that an interval covers, while the restricted LP only holds the columns that were added, so much larger batches and periods fit in memory.
+"""
+import numpy as np
+
+from Common.variables import DecisionVariables
+from Common.model_builder import SparseRows, dominant_time_steps
+from Common.backends import Solution, get_backend
+from Common.stats import timed, counted, record_solution
+
+
+# The number of evenly spaced starts of each job (including its first and last start) in the first restricted LP
+INITIAL_STARTS = 5
+
+# Starts whose reduced cost is above -REDUCED_COST_TOLERANCE are treated as not improving the LP
+REDUCED_COST_TOLERANCE = 1e-7
+
+# The number of jobs whose starts are priced at once when only the best reduced cost of every job is needed
+PRICING_BLOCK = 64
+
+
+
+"""
+----- Hold the restricted LP -----
+
+* RestrictedMaster -> This class holds the relaxed PDAC LP restricted to the starts that have been added so far
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   height (list) -> The height of each job
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*   backend (str) -> The solver backend that solves the restricted LP, either 'cplex' or 'highs'
+*   compress_time (bool) -> Whether to only build the time step rows that can decide the PDAC (see dominant_time_steps)
+*   price_every_start (bool) -> Whether the master keeps the job and start of every interval so that price can be used. The coarse LP
+*       never prices every start at once, so it skips these arrays, which are as long as the full LP has columns
+*
+* ADDITIONAL
+* The objective variable d is variable 0 and the added starts follow in the order they were added. The time step rows come first, followed
+* by one assignment row per job. The decision variables have no upper bound of 1, because their assignment row already keeps them below it,
+* and a bound would let a start that is already in the LP show a negative reduced cost
+"""
+class RestrictedMaster:
+    def __init__(self, intervals, height, resources, num_time_steps, backend='cplex', compress_time=False, price_every_start=True):
+        self.intervals = intervals
+        self.height = np.asarray(height, dtype=np.float64)
+        self.num_time_steps = num_time_steps
+
+        # The time steps that get a row. Without compression every time step does
+        if compress_time:
+            self.time_steps = dominant_time_steps(intervals, resources, num_time_steps)
+        else:
+            self.time_steps = np.arange(num_time_steps, dtype=np.int64)
+
+        # Every interval in the overall numbering, and whether it is in the restricted LP yet
+        self.interval_jobs = None
+        self.interval_starts = None
+        self.added = None
+        if price_every_start:
+            self.interval_jobs = intervals.interval_jobs()
+            self.interval_starts = intervals.interval_starts()
+            self.added = np.zeros(intervals.num_intervals(), dtype=bool)
+
+        # The interval that each variable after d stands for
+        self.columns = np.zeros(0, dtype=np.int64)
+
+        self.session = get_backend(backend).open()
+        self.session.add_variables(obj=[1], lb=[0], ub=[np.inf])
+
+        # The time step rows only hold d until starts are added
+        num_rows = len(self.time_steps)
+        time_rows = SparseRows(np.arange(num_rows + 1, dtype=np.int64), np.zeros(num_rows, dtype=np.int64), np.full(num_rows, -1.0))
+        self.session.add_rows(time_rows, 'L', np.asarray(resources, dtype=np.float64)[self.time_steps])
+
+
+    """
+    * initial_columns -> This function returns INITIAL_STARTS evenly spaced intervals of every job, always including its first (naive)
+    *   start and its last start, in the overall interval numbering
+    *
+    * INPUTS
+    *   start_step (int) -> If this is given, every start_step-th start of every job is returned instead, along with its last start
+    """
+    def initial_columns(self, start_step=None):
+        count = self.intervals.count
+
+        if start_step is not None:
+            # Every job's starts 0, start_step, 2 * start_step, ... and its last start, as positions among its own starts
+            grid = np.concatenate((np.arange(0, count.max(initial=0), start_step, dtype=np.int64), [-1]))
+            positions = np.where(grid[None, :] < 0, count[:, None] - 1, grid[None, :])
+            keep = (positions < count[:, None]) & (count[:, None] > 0)
+
+            return np.unique((self.intervals.offsets[:-1, None] + positions)[keep])
+
+        steps = np.arange(INITIAL_STARTS, dtype=np.int64)
+
+        positions = np.rint(steps[None, :] * (count[:, None] - 1) / (INITIAL_STARTS - 1)).astype(np.int64)
+        positions = self.intervals.offsets[:-1, None] + np.maximum(positions, 0)
+
+        # Short jobs have fewer starts than INITIAL_STARTS, so their positions repeat
+        return np.unique(positions[count > 0])
+
+
+    """
+    * locate -> This function returns the job and start time of each of the given intervals, in the overall interval numbering
+    """
+    def locate(self, intervals):
+        jobs = np.searchsorted(self.intervals.offsets, intervals, side='right') - 1
+        starts = self.intervals.first_start[jobs] + (intervals - self.intervals.offsets[jobs])
+
+        return (jobs, starts)
+
+
+    """
+    * add_columns -> This function adds the given intervals to the restricted LP
+    *
+    * INPUTS
+    *   intervals (array) -> The intervals to add, in the overall interval numbering
+    *   with_assignment (bool) -> Whether the assignment rows already exist. If they do, each column also gets its entry in its job's row
+    """
+    def add_columns(self, intervals, with_assignment=True):
+        jobs, starts = self.locate(intervals)
+
+        # The rows of the time steps that the interval covers are always one run of rows, found by a binary search in the kept time steps
+        first_row = np.searchsorted(self.time_steps, starts, side='left')
+        last_row = np.searchsorted(self.time_steps, starts + self.intervals.length[jobs], side='left')
+
+        count = last_row - first_row + (1 if with_assignment else 0)
+        indptr = np.zeros(len(intervals) + 1, dtype=np.int64)
+        np.cumsum(count, out=indptr[1:])
+
+        indices = np.repeat(first_row - indptr[:-1], count) + np.arange(indptr[-1], dtype=np.int64)
+        data = np.repeat(self.height[jobs], count)
+        if with_assignment:
+            indices[indptr[1:] - 1] = len(self.time_steps) + jobs
+            data[indptr[1:] - 1] = 1.0
+
+        self.session.add_variables(
+            obj=np.zeros(len(intervals)),
+            lb=np.zeros(len(intervals)),
+            ub=np.full(len(intervals), np.inf),
+            columns=SparseRows(indptr, indices, data)
+        )
+
+        if self.added is not None:
+            self.added[intervals] = True
+        self.columns = np.concatenate((self.columns, intervals))
+
+
+    """
+    * add_assignment_rows -> This function adds the assignment row of every job over the columns that have been added so far
+    """
+    def add_assignment_rows(self):
+        jobs, _ = self.locate(self.columns)
+        order = np.argsort(jobs, kind='stable')
+
+        offsets = np.zeros(len(self.intervals) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(jobs, minlength=len(self.intervals)), out=offsets[1:])
+
+        rows = SparseRows(offsets, order + 1, np.ones(len(order)))
+        self.session.add_rows(rows, 'E', np.ones(len(self.intervals)))
+
+
+    """
+    * price -> This function returns the reduced cost of every interval, given the dual values of a solution of the restricted LP
+    """
+    def price(self, duals):
+        prefix, job_duals = self.split_duals(duals)
+
+        return self.reduced_costs(prefix, job_duals, self.interval_jobs, self.interval_starts)
+
+
+    """
+    * best_reduced_costs -> This function returns the smallest reduced cost of every job that has a start, given the dual values of a
+    *   solution of the restricted LP. The jobs are priced PRICING_BLOCK at a time, so only a block of their starts is ever held at once
+    """
+    def best_reduced_costs(self, duals):
+        prefix, job_duals = self.split_duals(duals)
+
+        jobs = np.flatnonzero(self.intervals.count > 0)
+        best = np.empty(len(jobs), dtype=np.float64)
+        for first in range(0, len(jobs), PRICING_BLOCK):
+            block = jobs[first:first + PRICING_BLOCK]
+            count = self.intervals.count[block]
+
+            # The job and start of every start of the block, numbered from the block's first start
+            offsets = np.zeros(len(block), dtype=np.int64)
+            np.cumsum(count[:-1], out=offsets[1:])
+            owners = np.repeat(block, count)
+            starts = self.intervals.first_start[owners] + (np.arange(int(count.sum()), dtype=np.int64) - np.repeat(offsets, count))
+
+            best[first:first + len(block)] = np.minimum.reduceat(self.reduced_costs(prefix, job_duals, owners, starts), offsets)
+
+        return best
+
+
+    """
+    * split_duals -> This function returns the prefix sums of the time step duals (with zero at every time step that has no row) and the
+    *   duals of the assignment rows
+    """
+    def split_duals(self, duals):
+        time_duals = np.zeros(self.num_time_steps, dtype=np.float64)
+        time_duals[self.time_steps] = duals[:len(self.time_steps)]
+
+        return (np.concatenate(([0.0], np.cumsum(time_duals))), duals[len(self.time_steps):])
+
+
+    """
+    * reduced_costs -> This function returns the reduced cost of starting each of the given jobs at the given start times
+    """
+    def reduced_costs(self, prefix, job_duals, jobs, starts):
+        window = prefix[starts + self.intervals.length[jobs]] - prefix[starts]
+
+        return -job_duals[jobs] - self.height[jobs] * window
+
+
+    """
+    * decision_variables -> This function returns the layout of the added columns, ordered job by job, along with where each of them is
+    *   in the restricted LP
+    """
+    def decision_variables(self):
+        jobs, starts = self.locate(self.columns)
+        order = np.lexsort((starts, jobs))
+
+        jobs = jobs[order]
+        starts = starts[order]
+        layout = DecisionVariables(jobs, starts, starts + self.intervals.length[jobs], len(self.intervals))
+
+        return (layout, order + 1)
+
+
+
+"""
+----- Generate the columns -----
+
+* generate_columns -> This function solves the relaxed PDAC LP by column generation and returns the layout of the columns it created along
+*   with the LP solution over those columns
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   height (list) -> The height of each job
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*   backend (str) -> The solver backend that solves the restricted LPs, either 'cplex' or 'highs'
+*   compress_time (bool) -> Whether to only build the time step rows that can decide the PDAC
+*   max_rounds (int) -> An optional limit on the number of pricing rounds
+*   start_step (int) -> If this is given, the first restricted LP holds every start_step-th start of every job (and its last start)
+*       instead of INITIAL_STARTS starts
+*   stats (SolveStats) -> An optional statistics object that records how long solving and pricing took, what the solver reported, the
+*       number of pricing rounds and the number of columns that were created
+*
+* ADDITIONAL
+* The solution's values follow the returned layout, so it can be rounded the same way as the solution of the full LP. Its bound is a proven
+* lower bound on the full LP: the restricted objective plus the most negative reduced cost of every job. When no improving start is left
+* the bound equals the objective, which proves that the LP is solved to optimality. If max_rounds stops the generation early, the objective
+* can be above the LP optimum but the bound is still valid
+"""
+def generate_columns(intervals, height, resources, num_time_steps, backend='cplex', compress_time=False, max_rounds=None, start_step=None, stats=None):
+    with timed(stats, 'build'):
+        master = RestrictedMaster(intervals, height, resources, num_time_steps, backend, compress_time)
+        master.add_columns(master.initial_columns(start_step), with_assignment=False)
+        master.add_assignment_rows()
+
+    rounds = 0
+    while True:
+        with timed(stats, 'solve'):
+            solution = master.session.solve()
+        record_solution(stats, solution)
+
+        # Price every interval and keep the best start of each job whose reduced cost is negative
+        with timed(stats, 'price'):
+            reduced_costs = master.price(solution.duals)
+            best = np.minimum.reduceat(reduced_costs, intervals.offsets[:-1][intervals.count > 0])
+            bound = solution.objective + float(np.minimum(best, 0).sum())
+
+            candidates = np.flatnonzero((reduced_costs < -REDUCED_COST_TOLERANCE) & ~master.added)
+            if len(candidates) > 0:
+                # Sort by job and then by reduced cost, and take the first candidate of each job
+                order = np.lexsort((reduced_costs[candidates], master.interval_jobs[candidates]))
+                candidates = candidates[order]
+                first = np.concatenate(([True], master.interval_jobs[candidates][1:] != master.interval_jobs[candidates][:-1]))
+                candidates = candidates[first]
+
+        rounds += 1
+        counted(stats, 'pricing_rounds')
+        if len(candidates) == 0 or (max_rounds is not None and rounds >= max_rounds):
+            break
+
+        with timed(stats, 'build'):
+            master.add_columns(candidates)
+
+    # Lay the columns out job by job so that the solution can be rounded
+    decision_variables, positions = master.decision_variables()
+    counted(stats, 'columns', len(decision_variables))
+    bound = solution.objective if len(candidates) == 0 else bound
+
+    return (decision_variables, Solution(solution.primal[positions], solution.objective, bound))
+
+
+
+"""
+----- Solve the LP over a coarse grid -----
+
+* solve_coarse_lp -> This function solves the relaxed PDAC LP over every start_step-th start of every job (and its last start) and returns
+*   the layout of those columns along with the LP solution over them
+*
+* INPUTS
+*   intervals (JobIntervals) -> The range of intervals that each job can run within
+*   height (list) -> The height of each job
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*   backend (str) -> The solver backend that solves the LP, either 'cplex' or 'highs'
+*   compress_time (bool) -> Whether to only build the time step rows that can decide the PDAC
+*   start_step (int) -> The spacing of the starts of every job that are given a column
+*   stats (SolveStats) -> An optional statistics object that records how long building, solving and pricing took and what the solver
+*       reported
+*
+* ADDITIONAL
+* No other start is ever added, so nothing is kept for the starts that are not on the grid and they are only priced a block of jobs at a
+* time, to find the solution's bound. The bound is a proven lower bound on the full LP in the same way as for generate_columns
+"""
+def solve_coarse_lp(intervals, height, resources, num_time_steps, backend='cplex', compress_time=False, start_step=1, stats=None):
+    with timed(stats, 'build'):
+        master = RestrictedMaster(intervals, height, resources, num_time_steps, backend, compress_time, price_every_start=False)
+        master.add_columns(master.initial_columns(start_step), with_assignment=False)
+        master.add_assignment_rows()
+
+    with timed(stats, 'solve'):
+        solution = master.session.solve()
+    record_solution(stats, solution)
+
+    # Bound the full LP with the best reduced cost of every job
+    with timed(stats, 'price'):
+        best = master.best_reduced_costs(solution.duals)
+        bound = solution.objective
+        if len(best) > 0 and best.min() < -REDUCED_COST_TOLERANCE:
+            bound += float(np.minimum(best, 0).sum())
+    counted(stats, 'pricing_rounds')
+
+    decision_variables, positions = master.decision_variables()
+    counted(stats, 'columns', len(decision_variables))
+
+    return (decision_variables, Solution(solution.primal[positions], solution.objective, bound))
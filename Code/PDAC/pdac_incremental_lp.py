@@ -0,0 +1,208 @@
+"""
+----- Grow the PDAC LP Across Batch Sizes -----
+
+This program keeps one relaxed PDAC LP alive while jobs are added to it. The analyses sweep the batch size upwards (for example from 500
+to 1,100 jobs in steps of 100), and every batch holds the jobs of the batch before it plus some new ones. Instead of building and solving
+a new LP for each batch size, the new jobs are added to the LP that was already solved: each new decision variable becomes a new column
+with its heights already in the time step rows, and each new job gets its own assignment row. The time step rows and the objective
+variable d never change.
+
+With the CPLEX backend the problem stays loaded in CPLEX and each solve starts from the basis of the previous one, so a sweep costs about
+one large solve plus a small re-solve for every step. Backends that cannot keep a problem between solves rebuild it each time and give the
+same results.
+"""
+import numpy as np
+
+from Common.job_store import generate_jobs
+from Common.intervals import get_job_intervals
+from Common.variables import DecisionVariables, generate_decision_variables
+from Common.model_builder import SparseRows
+from Common.backends import Solution, get_backend
+from Common.rounding import round_relaxed_solution
+from Common.profile import height_profiles, pdac_objectives
+from Common.stats import timed, counted, record_solution
+from Common.results import ScheduleResult
+from PDAC.pdac_scheduling_lp import choose_best_schedule
+
+
+
+"""
+----- Hold the growing LP -----
+
+* IncrementalPdacModel -> This class holds a relaxed PDAC LP that jobs can be added to after it has been solved
+*
+* INPUTS
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   start_time (int) -> The earliest possible starting time for each job
+*   end_time (int) -> The latest possible ending time for each job
+*   backend (str) -> The solver backend that solves the model, either 'cplex' or 'highs'
+*
+* ADDITIONAL
+* The objective variable d is variable 0 and the time step rows are rows 0 to num_time_steps - 1, so neither moves when jobs are added.
+* Decision variable k of the jobs added so far is variable k + 1. Unlike in solve_pdac_lp, d has no upper bound, because the total height of
+* the jobs grows with every batch
+"""
+class IncrementalPdacModel:
+    def __init__(self, resources, start_time, end_time, backend='cplex'):
+        self.resources = resources
+        self.start_time = start_time
+        self.num_time_steps = end_time - start_time
+
+        self.session = get_backend(backend).open()
+        self.solution = None
+
+        # Every job added so far and the layout of their decision variables
+        self.height = np.zeros(0, dtype=np.float64)
+        self.decision_variables = DecisionVariables(np.zeros(0), np.zeros(0), np.zeros(0), 0)
+
+        # The objective variable d, followed by one time step row per time step that only holds d for now
+        self.session.add_variables(obj=[1], lb=[0], ub=[np.inf])
+
+        time_rows = SparseRows(
+            np.arange(self.num_time_steps + 1, dtype=np.int64),
+            np.zeros(self.num_time_steps, dtype=np.int64),
+            np.full(self.num_time_steps, -1.0)
+        )
+        self.session.add_rows(time_rows, 'L', resources[:self.num_time_steps])
+
+
+    def num_jobs(self):
+        return len(self.height)
+
+
+    """
+    * add_jobs -> This function adds a batch of new jobs to the LP
+    *
+    * INPUTS
+    *   jobs (JobStore) -> The jobs to add. They are numbered after the jobs that were already added
+    *
+    * ADDITIONAL
+    * Each new decision variable is added as a column that holds its job's height in the row of every time step its interval covers. Each
+    * new job then gets an assignment row that makes its decision variables add up to one
+    """
+    def add_jobs(self, jobs):
+        intervals = get_job_intervals(jobs, self.start_time)
+        new_variables = generate_decision_variables(intervals)
+        height = np.asarray(jobs.height, dtype=np.float64)
+
+        # The column of each new decision variable covers the time steps from its start up to (not including) its end
+        count = new_variables.end - new_variables.start
+        indptr = np.zeros(len(new_variables) + 1, dtype=np.int64)
+        np.cumsum(count, out=indptr[1:])
+        time_steps = np.repeat(new_variables.start - indptr[:-1], count) + np.arange(indptr[-1], dtype=np.int64)
+        columns = SparseRows(indptr, time_steps, np.repeat(height[new_variables.job], count))
+
+        indices = self.session.add_variables(
+            obj=np.zeros(len(new_variables)),
+            lb=np.zeros(len(new_variables)),
+            ub=np.ones(len(new_variables)),
+            columns=columns
+        )
+
+        # One assignment row for every new job over its own decision variables
+        self.session.add_rows(SparseRows(new_variables.offsets.copy(), indices, np.ones(len(indices))), 'E', np.ones(len(jobs)))
+
+        # Number the new decision variables and jobs after the existing ones
+        num_jobs = self.num_jobs()
+        self.decision_variables = DecisionVariables(
+            np.concatenate((self.decision_variables.job, new_variables.job + num_jobs)),
+            np.concatenate((self.decision_variables.start, new_variables.start)),
+            np.concatenate((self.decision_variables.end, new_variables.end)),
+            num_jobs + len(jobs)
+        )
+        self.height = np.concatenate((self.height, height))
+        self.solution = None
+
+
+    """
+    * solve -> This function solves the LP with every job added so far and returns its objective value
+    *
+    * INPUTS
+    *   stats (SolveStats) -> An optional statistics object that records how long solving the model took and what the solver reported
+    """
+    def solve(self, stats=None):
+        with timed(stats, 'solve'):
+            solution = self.session.solve()
+        record_solution(stats, solution)
+
+        # Drop the objective variable d so that the decision variables start at index 0 again, as the rounding expects
+        self.solution = Solution(solution.primal[1:], solution.objective, solution.bound, solution.duals, solution.iterations, solution.nodes)
+
+        return self.solution.objective
+
+
+    """
+    * choose_schedule -> This function rounds the last LP solution into a schedule and returns its objective value and heights
+    *
+    * INPUTS
+    *   rng (numpy Generator) -> The random number generator used to round the LP solution. Pass a seeded one to make the schedule repeatable
+    *   samples (int) -> The number of times to round the LP solution
+    *   time_budget (float) -> An optional limit on the number of seconds spent drawing the roundings
+    *   stats (SolveStats) -> An optional statistics object that records how long rounding took and how many roundings were drawn
+    *
+    * ADDITIONAL
+    * As with solve_pdac_lp, the result is a ScheduleResult (see results) with the objective value, the heights and the LP solution. With
+    * more than one sample, it is the best of the roundings and its summary is filled in
+    """
+    def choose_schedule(self, rng=None, samples=1, time_budget=None, stats=None):
+        if self.solution is None:
+            raise RuntimeError("The model has to be solved after its last jobs were added before it can be rounded")
+
+        if samples > 1:
+            with timed(stats, 'round'):
+                best_objective, best_heights, summary = choose_best_schedule(
+                    self.decision_variables, self.num_time_steps, self.height, self.resources, self.solution, samples, time_budget, rng
+                )
+            counted(stats, 'samples', summary['samples'])
+
+            return ScheduleResult(best_objective, best_heights, summary, self.solution)
+
+        with timed(stats, 'round'):
+            chosen = round_relaxed_solution(self.solution.primal, self.decision_variables, rng)
+            final_heights = height_profiles(
+                self.decision_variables.start[chosen], self.decision_variables.end[chosen], self.height, self.num_time_steps
+            )
+        counted(stats, 'samples')
+
+        return ScheduleResult(float(pdac_objectives(final_heights, self.resources)), final_heights.tolist(), solution=self.solution)
+
+
+
+"""
+----- Sweep the batch sizes -----
+
+* solve_pdac_lp_sweep -> This function solves the relaxed PDAC LP for every batch size of a sweep by growing a single model, and returns
+*   the ScheduleResult of the rounded schedule of each batch size
+*
+* INPUTS
+*   jobs_array (JobStore or list) -> An unfiltered store or list of all of the possible jobs available for scheduling
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   start_time (int) -> The earliest possible starting time for each job
+*   end_time (int) -> The latest possible ending time for each job
+*   max_length (int) -> The maximum length of a given job
+*   batch_sizes (list) -> The batch sizes of the sweep
+*   backend (str) -> The solver backend that solves the model, either 'cplex' or 'highs'
+*   rng (numpy Generator) -> The random number generator used to round the LP solutions
+*   stats (SolveStats) -> An optional statistics object that records how long each phase took, the size of the model and what the
+*       solver reported
+*
+* ADDITIONAL
+* The batch of each size is the first batch_size jobs that fall within the window, exactly as generate_jobs picks them for solve_pdac_lp. So
+* every batch holds the batch before it, and only the jobs between two batch sizes have to be added. The results are returned in the same
+* order as batch_sizes
+"""
+def solve_pdac_lp_sweep(jobs_array, resources, start_time, end_time, max_length, batch_sizes, backend='cplex', rng=None, stats=None):
+    # Generate the largest batch once. Every smaller batch is a prefix of it
+    jobs = generate_jobs(jobs_array, start_time, end_time, max_length, max(batch_sizes))
+
+    model = IncrementalPdacModel(resources, start_time, end_time, backend)
+
+    results = {}
+    for batch_size in sorted(set(batch_sizes)):
+        with timed(stats, 'build'):
+            model.add_jobs(jobs.take(np.arange(model.num_jobs(), batch_size)))
+
+        model.solve(stats)
+        results[batch_size] = model.choose_schedule(rng, stats=stats)
+
+    return [results[batch_size] for batch_size in batch_sizes]
@@ -6,291 +6,127 @@ the peak amount of power demand above a provided resource curve.
 This is a relaxed ILP problem. Therefore, it uses typical LP to solve the problem in polynomial time and then probability to estimate 
 the optimal schedule of jobs.
 """
-import cplex
-import random
-from collections import defaultdict
+import time
+import numpy as np
 
+from Common.job_store import generate_jobs
+from Common.intervals import get_job_intervals
+from Common.variables import DecisionVariables, generate_decision_variables
+from Common.model_builder import get_job_heights, generate_ilp, generate_constraints
+from Common.backends import solve_model
+from Common.rounding import round_relaxed_solution
+from Common.profile import height_profiles, pdac_objectives
+from Common.stats import timed, counted, record_model, record_solution
+from Common.planner import plan_pdac_lp
+from Common.solution_cache import get_cache, lookup_solution
+from Common.results import ScheduleResult
+from PDAC.pdac_column_generation import generate_columns, solve_coarse_lp
+from PDAC.pdac_scheduling_greedy import generate_greedy_schedule
 
 
-"""
------ Generate a list of jobs -----
+# The number of roundings that are drawn and scored together when rounding the LP solution many times
+SAMPLE_BLOCK_SIZE = 64
 
-* generate_jobs -> This function takes in a random sample of jobs and returns a list of job objects. This function also selects 
-*   these jobs based on the given input parameters
-* 
-* INPUTS
-*   jobs_array (List) -> an unsorted list of all of the jobs available to the user
-*   start_time (int) -> The time after which all jobs must start
-*   end_time (int) -> The time by which all jobs must end
-*   max_length (int) -> The maximum duration of a given job
-*   batch_size (int) -> The size of the job batch so be created
-* 
-* ADDITIONAL
-* This function will select the jobs based on the parameters. However, it should not select different jobs than other algorithms becuase they will all
-* be provided with the same jobs_array list and parameters
-"""
-def generate_jobs(jobs_array, start_time, end_time, max_length, batch_size):
-    jobs = []
-
-    # Iterate through the job objects and create an array of objects that fall within the specified time window
-    i = 0
-    curr_index = 0
-    while (i < batch_size):
-        aj = jobs_array[curr_index]['release']
-        dj = jobs_array[curr_index]['deadline']
-        lj = jobs_array[curr_index]['length']
-
-        # Check if the specific job lies within the correct window
-        # The funky syntax is used to put the job id at the very front of the dictionary
-        if aj >= start_time and dj <= end_time and lj <= max_length:
-            job_id = {"job_id" : i}
-            job_object = {**job_id, **jobs_array[curr_index]}
-            jobs.append(job_object)
-            
-            i += 1
-        
-        curr_index += 1
-
-    return jobs
 
 
 """
------ Generate a list of job intervals -----
+----- Get the job heights from the schedule -----
 
-* get_job_intervals -> This function is responsible for going through each of the jobs in the algorithm and returning all the intervals 
-*   that the job could possibly run within
+* choose_relaxed_schedule -> This function chooses a schedule probabailistically based on the results of the LP solution
 * 
 * INPUTS
-*   jobs (list) -> This is the list of jobs in this case
+*   decision_variables (DecisionVariables) -> The layout of all of the decision variables in the ILP
+*   height (list) -> This list of job heights for each job in the trial
+*   intervals (JobIntervals) -> The range of intervals that each respective job can run in
+*   solution (Solution) -> The solution of the LP
+*   rng (numpy Generator) -> The random number generator used to round the LP solution. Pass a seeded one to make the schedule repeatable
 """
-def get_job_intervals(jobs, start_time):
-    intervals = [[] for _ in range(len(jobs))]
-    for i, job in enumerate(jobs):
-        # Extract the necessary information from the job object
-        release = job['release'] - start_time
-        deadline = job['deadline'] - start_time
-        duration = job['length']
-        num = release
-
-        # Add the execution intervals to the sublist
-        while (num + duration <= deadline):
-            intervals[i].append((num, num + duration))
-            num += 1
-
-    return intervals
-
+def choose_relaxed_schedule(decision_variables, intervals, num_time_steps, height, solution, rng=None):
 
+    # The values of every decision variable, as returned by the solver
+    solution_values = solution.primal
 
-"""
------ Get the height of each job -----
-
-* get_job_heights -> This function returns a list of the height of each respective job. The index of the job height corresponds to the 
-*   jobs id
-* 
-* INPUTS
-*   jobs (list) -> The list of jobs for the trial
-"""
-def get_job_heights(jobs):
-    height = [job['height'] for job in jobs]
+    # Randomly choose one interval (decision variable) for every job, using the decision variable values as the probabilities
+    # Add those chosen variables to a final list so that the overall objective value can be ascertained
+    final_intervals = round_relaxed_solution(solution_values, decision_variables, rng)
 
-    return height
+    # Generate the height of all of the jobs over the course of all of the time steps from the selected job intervals in
+    # final_intervals. From this we can determine the objective value of d by simply taking the maximum from this height list
+    final_heights = height_profiles(decision_variables.start[final_intervals], decision_variables.end[final_intervals], height, num_time_steps)
 
+    return final_heights.tolist()
 
 
 """
------ Generate a list of LP decision variables ----- 
+----- Keep the best of many roundings -----
 
-* generate_decision_variables -> This function generates a list of all of the decision variables for the ILP
+* choose_best_schedule -> This function rounds the LP solution many times and returns the best schedule that was drawn along with
+*   statistics about the PDAC of all of the schedules
 * 
 * INPUTS
-*   intervals (list) -> This is the list of the intervals that each job can run within
+*   decision_variables (DecisionVariables) -> The layout of all of the decision variables in the ILP
+*   num_time_steps (int) -> The number of discrete time steps in the period
+*   height (list) -> This list of job heights for each job in the trial
+*   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
+*   solution (Solution) -> The solution of the LP
+*   samples (int) -> The number of roundings to draw
+*   time_budget (float) -> An optional limit on the number of seconds spent drawing roundings
+*   rng (numpy Generator) -> The random number generator used to round the LP solution
 * 
 * ADDITIONAL
-    - This code creates a list of decision variables with the form {'name': x_i_j, value: ?} where each name is a distinct time interval for a distinct job.
-    - Specifically, this is saying that decision variable x_i_j is the ith possible interval for job j where the value is the actual interval of time steps.
-    - This is stored here so we don't have to repeatedly query the intervals list
+* The roundings are drawn in blocks of SAMPLE_BLOCK_SIZE. Every block is drawn as one (block x jobs) matrix of choices, turned into a
+* (block x time steps) matrix of height profiles and scored all at once. When there is a time budget, no new block is started after it
+* runs out, but at least one block is always drawn
 """
-def generate_decision_variables(intervals):
-    decision_variables = []
-    for j, interval_set in enumerate(intervals):
-        for i, interval in enumerate(interval_set):
-            # Add the decision variable and it's corresponding interval to the list
-            decision_variables.append({'name' : f'x_{i}_{j}', 'value': interval})
-    
-    return decision_variables
+def choose_best_schedule(decision_variables, num_time_steps, height, resources, solution, samples, time_budget=None, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
 
+    # The LP solution is shared by every rounding
+    solution_values = solution.primal
 
+    stop_time = None
+    if time_budget is not None:
+        stop_time = time.perf_counter() + time_budget
 
-"""
-* generate_ilp -> This creates an ILP CPLEX instance
-* 
-* INPUTS
-*   decision_variables (list) -> This is the list of all of the decision variables in the ILP
-*   height (list) -> This list of job heights for each job in the trial
-"""
-def generate_ilp(decision_variables, height): 
-    # Create the cplex problem
-    problem = cplex.Cplex()
-    problem.set_problem_type(cplex.Cplex.problem_type.LP)
-    problem.set_results_stream(None)
-
-    # Maximize objective
-    problem.objective.set_sense(problem.objective.sense.minimize)
+    objectives = []
+    best_objective = None
+    best_heights = None
 
-    # This is the name of the objective variable that we will minimize
-    objective_variable = 'd'
+    num_drawn = 0
+    while num_drawn < samples:
+        block = min(SAMPLE_BLOCK_SIZE, samples - num_drawn)
 
-    # This retrieves the names of all of the decision variables 
-    names = [variable['name'] for variable in decision_variables] + [objective_variable]
+        # Draw the block of roundings and score the height profile of each of them
+        chosen = round_relaxed_solution(solution_values, decision_variables, rng, samples=block)
+        profiles = height_profiles(decision_variables.start[chosen], decision_variables.end[chosen], height, num_time_steps)
+        block_objectives = pdac_objectives(profiles, resources)
 
-    # these are the other parameters needed to form the basis of the linear programming problem
-    obj = [0 for _ in range(len(decision_variables))] + [1] # only minimizing d
-    lb = [0 for _ in range(len(decision_variables))] + [0]
-    ub = [1 for _ in range(len(decision_variables)) ] + [sum(height)]
+        # Keep the best schedule seen so far
+        best = int(np.argmin(block_objectives))
+        if best_objective is None or block_objectives[best] < best_objective:
+            best_objective = float(block_objectives[best])
+            best_heights = profiles[best].tolist()
 
+        objectives.append(block_objectives)
+        num_drawn += block
 
-    # Establish the problem
-    # *** Here the variables are set to a 'continuous' type. So they can assume any value in [0, 1] *** 
-    types = [problem.variables.type.continuous] * (len(decision_variables)) + [problem.variables.type.continuous]
-    problem.variables.add(obj=obj, lb=lb, ub=ub, types=types, names=names)
+        if stop_time is not None and time.perf_counter() >= stop_time:
+            break
 
-    return problem
+    # Summarize the PDAC of every schedule that was drawn
+    objectives = np.concatenate(objectives)
+    summary = {
+        'samples': len(objectives),
+        'best': float(objectives.min()),
+        'mean': float(objectives.mean()),
+        'median': float(np.median(objectives)),
+        'std': float(objectives.std()),
+        'worst': float(objectives.max()),
+        'objectives': objectives,
+    }
 
-
-
-"""
------ Generate the LP constraints -----
-
-* generate_contraints -> This function generates and applies the necessary linear constraints to the ILP instance
-* 
-* INPUTS
-*   decision_variables (list) -> This is the list of all of the decision variables in the ILP
-*   height (list) -> This list of job heights for each job in the trial
-*   intervals (list) -> The list of intervals that each respective job can run in
-*   problem (CPLEX problem) -> The CPLEX problem instance
-* 
-* ADDITIONAL
-* This function does not have a return value. It's job is to apply the constraints to the problem
-"""
-
-def generate_constraints(resources, decision_variables, height, intervals, problem, num_time_steps):
-    """
-    This will generate the first set of constraints
-
-    This for loop adds the constraints that make it so that a job can run during only one interval. So for each job, aggregate all of the decision variables that correspond to each possible execution interval for that job. 
-    Then specify that they all of those decision variables can only add up to one
-    """
-    curr_index = 0
-    for interval in intervals:
-        # Aggregate all the decision variables that belong to one job
-        variables = decision_variables[curr_index : curr_index + (len(interval))]
-        variables = [v['name'] for v in variables]
-        curr_index += len(interval)
-        
-        # The coefficient of each decision variable is one
-        constraints = [1 for _ in range(len(variables))]
-
-        # This is saying that the sum of each of the decision variabels can only equal one
-        problem.linear_constraints.add(
-            lin_expr=[ [ variables, constraints ] ],
-            senses=['E'],
-            rhs=[1]
-        )
-
-
-    """
-    This generates the second set of constraints
-
-    It aggregates all of the desicion variables that correspond to intervals that could possibly be running during that time step.
-    It then aggregates the heights corresponding to the jobs that each decision variable represents. It multiplies 
-    those heights by the decision variables. However, the constraint ensures that the total sum is less than the max height d
-    """
-    # Preprocessing to make data lookup more efficient (using a hashmap)
-    # Go through each decision variable and its corresponding interval and add the decision variable to each time step during which 
-    # the job is (possibly) active
-    time_to_jobs = defaultdict(list)
-    for variable in decision_variables:
-        job_id = int(variable['name'].split('_')[-1])
-        job_start, job_end = variable['value'][0], variable['value'][1]
-
-        for t in range(job_start, job_end):
-            time_to_jobs[t].append((variable['name'], height[job_id]))
-    
-    # Go through each time step in the time period
-    # Get each decision variable for that time step and add it to a running ILP constraint equation
-    for i in range(num_time_steps):
-        use_variables = []
-        use_height = []
-
-        for var_name, height in time_to_jobs.get(i, []):
-            use_variables.append(var_name)
-            use_height.append(height)
-        
-        use_variables.append('d')
-        use_height.append(-1)
-
-        # Add constraint
-        # This constraint says that for all of the decision variables multiplied by their height at a specific time step
-        # should not sum to more than the objective variable d.
-        problem.linear_constraints.add(
-            lin_expr=[[use_variables, use_height]],
-            senses=['L'],
-            rhs=[resources[i]]
-        )
-
-
-"""
------ Get the job heights from the schedule -----
-
-* choose_relaxed_schedule -> This function chooses a schedule probabailistically based on the results of the LP solution
-* 
-* INPUTS
-*   decision_variables (list) -> This is the list of all of the decision variables in the ILP
-*   height (list) -> This list of job heights for each job in the trial
-*   intervals (list) -> The list of intervals that each respective job can run in
-*   problem (CPLEX problem) -> The CPLEX problem instance
-"""
-def choose_relaxed_schedule(decision_variables, intervals, num_time_steps, height, problem):
-    solution = problem.solution
-
-    # Loop through each of the jobs and generate a random number
-    # Choose a decision variable based on the probability of the current value of the decision variables
-    # Add that chosen variable to a final list so that the overall objective value can be ascertained
-    final_intervals = []
-    final_heights = [0 for _ in range(num_time_steps)]
-
-    curr_index = 0
-    # Loop through each job
-    for job_id in range(len(intervals)):
-        # Generate a random number for the job to be used to select a specific interval
-        random_num = random.uniform(0, 1)
-        probability = 0
-
-        # Loop through each interval in the job and get the value corresponding to each interval (decision variable)
-        # Add the decision variable to the final interval list based on the random number 
-        for i, interval in enumerate(intervals[job_id]):
-            decision_variable = decision_variables[curr_index]
-            decision_value = solution.get_values(decision_variable['name'])
-            probability += decision_value
-
-            if random_num <= probability and len(final_intervals) <= job_id:
-                final_intervals.append(decision_variable)
-            
-            curr_index += 1
-
-    # Generate the height of all of the jobs over the course of all of the time steps
-    # Do this by iterating through all of the selected job intervals in final_intervals and add their height values 
-    # to the final_heights arrays. From this we can determine the objective value of d
-    # simply take the maximum from this height list
-    for job_id, job in enumerate(final_intervals):
-        job_start = job['value'][0]
-        job_end = job['value'][1]
-        job_height = height[job_id]
-
-        for i in range(job_start, job_end):
-            final_heights[i] += job_height
-
-    return final_heights
+    return (best_objective, best_heights, summary)
 
 
 """
@@ -298,45 +134,141 @@ def choose_relaxed_schedule(decision_variables, intervals, num_time_steps, heigh
 *   returns the objective value and schedule of job heights
 * 
 * INPUTS 
-*   jobs_array (list) -> An unfiltered array of all of the possible jobs available for scheduling
+*   jobs_array (JobStore or list) -> An unfiltered store or list of all of the possible jobs available for scheduling
 *   resources (list) -> A list of height values representing the amount of available resources at each discrete time step
 *   start_time (int) -> The earliest possible starting time for each job
 *   end_time (int) -> The latest possible ending time for each job
 *   max_length (int) -> The maximum length of a given job
 *   batch_size (int) -> The number of jobs that should be included in the schedule
+*   stats (SolveStats) -> An optional statistics object that records how long each phase took, the size of the model and what the
+*       solver reported
+*   backend (str) -> The solver backend that solves the model, either 'cplex' or 'highs'
+*   rng (numpy Generator) -> The random number generator used to round the LP solution. Pass a seeded one to make the schedule repeatable
+*   samples (int) -> The number of times to round the LP solution. The LP is only solved once no matter how many roundings are drawn
+*   time_budget (float) -> An optional limit on the number of seconds spent drawing the roundings
+*   compress_time (bool) -> Whether to only build the time step rows that can decide the PDAC. The optimal objective is the same, but the
+*       model has far fewer rows and nonzeros
+*   mode (str) -> How the LP is built. 'full' creates a decision variable for every start of every job, and 'column_generation' only
+*       creates the starts that can improve the LP (see pdac_column_generation). Both give an optimal solution of the same LP. 'coarse'
+*       only allows every start_step-th start of every job, and 'greedy' skips the LP and schedules the jobs greedily. 'auto' picks the
+*       most exact of these whose model fits in memory_limit (see planner)
+*   memory_limit (int) -> An optional limit on the bytes the model may use. The size of the model is predicted from the job windows
+*       before anything is built, and a mode that would not fit raises a ModelTooLargeError. By default it is half of the physical
+*       memory
+*   cache (SolutionCache or str) -> An optional solution cache, or the path of its directory. If the same LP was solved before, its
+*       solution is read from the cache and only the rounding is done
+* 
+* ADDITIONAL
+* The result is a ScheduleResult (see results) with the objective value, the heights and the solution of the relaxed LP, whose bound is a
+* lower bound on the PDAC of every schedule of the batch. The solution is None in the 'greedy' mode, which solves no LP, and starts is
+* always None. With more than one sample, the result is the best of the roundings and its summary holds the number of roundings drawn and
+* the best, mean, median, standard deviation and worst of their PDAC values, along with every PDAC value. The greedy schedule is only drawn
+* once
 """
-def solve_pdac_lp(jobs_array, resources, start_time, end_time, max_length, batch_size):
+def solve_pdac_lp(jobs_array, resources, start_time, end_time, max_length, batch_size, stats=None, backend='cplex', rng=None, samples=1, time_budget=None, compress_time=False, mode='full', memory_limit=None, cache=None):
     # Specify the number of time steps 
     num_time_steps = end_time - start_time
 
     # Generate the jobs
-    jobs = generate_jobs(jobs_array, start_time, end_time, max_length, batch_size)
+    with timed(stats, 'jobs'):
+        jobs = generate_jobs(jobs_array, start_time, end_time, max_length, batch_size)
 
     # Generate the intervals
-    intervals = get_job_intervals(jobs, start_time)
+    with timed(stats, 'intervals'):
+        intervals = get_job_intervals(jobs, start_time)
 
     # Get the job heights
     height = get_job_heights(jobs)
 
-    # Generate the decision variables
-    decision_variables = generate_decision_variables(intervals)
+    # Predict the size of the model from the job windows and pick a mode that fits, before any of it is built
+    mode, start_step = plan_pdac_lp(intervals, num_time_steps, memory_limit, mode)
+    counted(stats, f'plan_{mode}')
+
+    if mode == 'greedy':
+        # Schedule the jobs greedily, from the least to the most flexible job, without building an LP
+        with timed(stats, 'schedule'):
+            order = jobs.sort_by_flexibility()
+            final_heights = generate_greedy_schedule(order, resources, get_job_intervals(order, start_time), num_time_steps)
+        objective_value = float(pdac_objectives(final_heights, resources))
+
+        if samples > 1:
+            objectives = np.array([objective_value])
+            summary = {'samples': 1, 'best': objective_value, 'mean': objective_value, 'median': objective_value, 'std': 0.0,
+                       'worst': objective_value, 'objectives': objectives}
+            return ScheduleResult(objective_value, final_heights, summary)
+
+        return ScheduleResult(objective_value, final_heights)
+
+    # Look for the solution of the same LP in the cache
+    cache = get_cache(cache)
+    options = {'mode': mode, 'start_step': start_step, 'compress_time': compress_time}
+    key, solution, extras = lookup_solution(cache, stats, 'pdac_lp', backend, options, height, intervals, resources, num_time_steps)
+
+    if solution is not None:
+        # Only the layout of the decision variables is needed to round the cached solution. A column generation solution is over the
+        # columns that were stored with it
+        with timed(stats, 'variables'):
+            if mode == 'full':
+                decision_variables = generate_decision_variables(intervals)
+            else:
+                job, start = extras['job'], extras['start']
+                decision_variables = DecisionVariables(job, start, start + intervals.length[job], len(intervals))
+
+    elif mode == 'column_generation':
+        # Only create the columns that can improve the LP. The solution is over those columns, and is rounded the same way
+        decision_variables, solution = generate_columns(intervals, height, resources, num_time_steps, backend, compress_time, stats=stats)
+
+    elif mode == 'coarse':
+        # Solve the LP over every start_step-th start of every job (and its last start), without adding any other start
+        decision_variables, solution = solve_coarse_lp(
+            intervals, height, resources, num_time_steps, backend, compress_time, start_step=start_step, stats=stats
+        )
+
+    elif mode == 'full':
+        # Build the model. Laying out the variables and building the constraints are timed separately from solving it
+        with timed(stats, 'variables'):
+            # Generate the decision variables
+            decision_variables = generate_decision_variables(intervals)
+
+            # Instantiate the model. The decision variables are continuous, so they can assume any value in [0, 1]
+            problem = generate_ilp(decision_variables, height, integer=False)
+
+        with timed(stats, 'constraints'):
+            # Apply the linear constraints to the problem
+            generate_constraints(resources, decision_variables, height, intervals, problem, num_time_steps, compress_time)
+
+        record_model(stats, problem)
+
+        # Solve the relaxed LP
+        with timed(stats, 'solve'):
+            solution = solve_model(problem, backend)
+        record_solution(stats, solution)
+
+    else:
+        raise ValueError(f"Unknown LP mode '{mode}'. The modes are 'auto', 'full', 'column_generation', 'coarse' and 'greedy'")
 
-    # Instantiate the CPLEX ILP
-    problem = generate_ilp(decision_variables, height)
+    if key is not None and extras is None:
+        layout = None
+        if mode != 'full':
+            layout = {'job': decision_variables.job, 'start': decision_variables.start}
+        cache.store(key, solution, layout)
 
-    # Apply the linear constraints to the problem
-    generate_constraints(resources, decision_variables, height, intervals, problem, num_time_steps)
+    # Draw many roundings from the single LP solution and keep the best one
+    if samples > 1:
+        with timed(stats, 'round'):
+            best_objective, best_heights, summary = choose_best_schedule(
+                decision_variables, num_time_steps, height, resources, solution, samples, time_budget, rng
+            )
+        counted(stats, 'samples', summary['samples'])
 
-    # Solve the relaxed LP
-    problem.solve()
+        return ScheduleResult(best_objective, best_heights, summary, solution)
 
     # Get the heights of the jobs at each time step in the schedule
-    final_heights = choose_relaxed_schedule(decision_variables, intervals, num_time_steps, height, problem)
+    with timed(stats, 'round'):
+        final_heights = choose_relaxed_schedule(decision_variables, intervals, num_time_steps, height, solution, rng)
+    counted(stats, 'samples')
 
     # Calculate the final objective value (PDAC) based on these heights and the resource curve
-    objective_value = 0
-    for i, height in enumerate(final_heights):
-        if height - resources[i] > objective_value:
-            objective_value = height - resources[i]
+    objective_value = float(pdac_objectives(final_heights, resources))
 
-    return (objective_value, final_heights)
\ No newline at end of file
+    return ScheduleResult(objective_value, final_heights, solution=solution)
\ No newline at end of file